@@ -1,7 +1,7 @@
 #!/bin/bash
 #Convenience Wrapper for TFLOW Utility: tflow/count_sequences.py
 #Count sequences in one or more .fasta[.gz], .fastq[.gz], .fna etc... files.
-#Usage: "count_sequences.sh [sequence_file_1.fa] [sequence_file....]"
+#Usage: "count_sequences.sh [--jobs N] [sequence_file_1.fa] [sequence_file....]"
 #For Full Usage: "count_sequences.sh -h"
 #
 #Dan Stribling
@@ -1,6 +1,8 @@
 #!/bin/bash
 #Convenience Wrapper for Main TFLOW Component: tflow/manifold.py
 #Usage: "tflow.sh RUN_MODE [--options]"
+#Batch Usage: "tflow.sh RUN_MODE --projects DIR [DIR...] [--concurrent_projects N]"
+#Dashboard Usage: "tflow.sh dashboard [--projects DIR [DIR...]]"
 #For Advanced Usage: "tflow.sh -h"
 #
 #Dan Stribling
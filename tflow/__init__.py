@@ -1,2 +1,2 @@
-__all__ = ['count_sequences', 'fasta', 'label_sequences', 'manifold', 'fasta_manip', 
-           'local_settings', 'util']
+__all__ = ['cache', 'count_sequences', 'compression', 'dashboard', 'fasta', 'fingerprint', 'label_sequences', 'manifold', 'fasta_manip', 
+           'local_settings', 'resources', 'util', 'watch']
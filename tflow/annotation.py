@@ -760,8 +760,14 @@ def reversedMapParse(inputStr):
     splitString = inputStr.split('|')
     return (splitString[1].strip(), splitString[0].lstrip('>').strip())
 
+# Tab-Separated Parser function for Name Map Class, for Maps Written by fasta.rename_records
+def tabMapParse(inputStr):
+    splitString = inputStr.rstrip('\r\n').split('\t')
+    return (splitString[0].lstrip('>').strip(), splitString[1].strip())
+
 
 default_map_parse = defaultMapParse
+tab_map_parse = tabMapParse
 
 class NameMap():
     def __init__(self, fileName=None, parser=defaultMapParse):  
@@ -0,0 +1,169 @@
+#TFLOW Component: Persistent Cache of Sequence File Counts and Statistics
+#
+#Dan Stribling
+#Florida State University
+#Center for Genomics and Personalized Medicine
+#Version 0.9, 04/20/2015
+#Project URL: http://www.github.com/fsugenomics/tflow
+
+import os
+import json
+import hashlib
+import fcntl
+import tempfile
+
+CACHE_FILE_NAME = 'TFLOW.auto.cache'
+CACHE_FILE_VARIABLE = 'TFLOW_CACHE_FILE'
+CACHE_HASH_VARIABLE = 'TFLOW_CACHE_HASH'
+HASH_BLOCK_SIZE = 1048576
+CACHE_VERSION = 1
+
+#Results are Stored per Absolute File Path Along with the File Fingerprint:
+#    {"version":1, "files":{path:{"size":..., "mtime":..., ["hash":...,]
+#                                 "results":{result_type:value}}}}
+#Any Change in Fingerprint Discards All Results for that File.
+#The cache file location is passed through the environment so that segment
+#subprocesses and worker pools share the cache of the project being run.
+
+# --- Cache Configuration ---
+def cache_file_name():
+    return os.environ.get(CACHE_FILE_VARIABLE, None)
+
+def use_hash():
+    return os.environ.get(CACHE_HASH_VARIABLE, '') in ['1', 'True', 'true']
+
+def set_cache_file(file_name, hash_contents=False):
+    if file_name:
+        os.environ[CACHE_FILE_VARIABLE] = os.path.abspath(file_name)
+        os.environ[CACHE_HASH_VARIABLE] = ('1' if hash_contents else '0')
+    else:
+        disable_cache()
+
+def disable_cache():
+    for variable in [CACHE_FILE_VARIABLE, CACHE_HASH_VARIABLE]:
+        if variable in os.environ:
+            del os.environ[variable]
+
+def option_enabled(value):
+    return value not in [False, None, '', 'False', 'false', 'F', 'f', '0']
+
+#Enable Project Cache According to "use_cache" and "cache_hash" Options
+def configure_cache(options):
+    if option_enabled(options.get('use_cache', True)) and 'project_directory' in options:
+        set_cache_file(os.path.join(options['project_directory'], CACHE_FILE_NAME),
+                       hash_contents=option_enabled(options.get('cache_hash', False)))
+    else:
+        disable_cache()
+
+
+# --- File Fingerprints ---
+def hash_file(file_name):
+    file_hash = hashlib.sha1()
+    with open(file_name, 'rb') as file_object:
+        block = file_object.read(HASH_BLOCK_SIZE)
+        while block:
+            file_hash.update(block)
+            block = file_object.read(HASH_BLOCK_SIZE)
+    return file_hash.hexdigest()
+
+def file_fingerprint(file_name, hash_contents=False):
+    file_stat = os.stat(file_name)
+    fingerprint = {'size':file_stat.st_size, 'mtime':repr(file_stat.st_mtime)}
+    if hash_contents:
+        fingerprint['hash'] = hash_file(file_name)
+    return fingerprint
+
+
+# --- Cache Reading and Writing ---
+#Exclusive Lock on "<file_name>.lock", Held for a Read-Modify-Write of a Shared File
+class FileLock():
+    def __init__(self, file_name):
+        self.lock_file = file_name + '.lock'
+        self.lock_object = None
+
+    def __enter__(self):
+        self.lock_object = open(self.lock_file, 'a')
+        fcntl.flock(self.lock_object.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        fcntl.flock(self.lock_object.fileno(), fcntl.LOCK_UN)
+        self.lock_object.close()
+        return False
+
+#Permissions a File Created with open() Would Have, as mkstemp() Files are Private
+def umask_file_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def read_cache(cache_file):
+    if not os.path.isfile(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r') as cache_object:
+            contents = json.load(cache_object)
+    except (IOError, ValueError):
+        return {}
+    if not isinstance(contents, dict) or contents.get('version') != CACHE_VERSION:
+        return {}
+    return contents.get('files', {})
+
+#Write Cache to a Temporary File in the Same Directory and Rename, so Readers
+#Never See a Partially Written Cache.
+def write_cache(cache_file, files):
+    cache_directory = os.path.dirname(cache_file) or '.'
+    (temp_handle, temp_name) = tempfile.mkstemp(prefix='.' + CACHE_FILE_NAME + '.',
+                                                dir=cache_directory)
+    try:
+        with os.fdopen(temp_handle, 'w') as temp_object:
+            json.dump({'version':CACHE_VERSION, 'files':files}, temp_object)
+        os.chmod(temp_name, umask_file_mode())
+        os.rename(temp_name, cache_file)
+    except (IOError, OSError, TypeError, ValueError):
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+
+def _matching_entry(files, file_name, hash_contents):
+    key = os.path.abspath(file_name)
+    entry = files.get(key, None)
+    if entry is None:
+        return None
+    fingerprint = file_fingerprint(file_name)
+    if entry.get('size') != fingerprint['size'] or entry.get('mtime') != fingerprint['mtime']:
+        return None
+    if hash_contents and entry.get('hash') != hash_file(file_name):
+        return None
+    return entry
+
+#Return Cached Result of Type "result_type" for File, or None if Missing or Stale
+def get_result(file_name, result_type):
+    cache_file = cache_file_name()
+    if not cache_file or not os.path.isfile(file_name):
+        return None
+    entry = _matching_entry(read_cache(cache_file), file_name, use_hash())
+    if entry is None:
+        return None
+    return entry.get('results', {}).get(result_type, None)
+
+#Store Result for File, Keeping Other Current Results for the Same File. The cache is
+#locked while updated, as it may be shared by count pool workers, concurrent segments
+#or batch projects. If the lock cannot be taken the result is not stored.
+def store_result(file_name, result_type, value):
+    cache_file = cache_file_name()
+    if not cache_file or not os.path.isfile(file_name):
+        return
+    hash_contents = use_hash()
+    try:
+        with FileLock(cache_file):
+            files = read_cache(cache_file)
+            entry = _matching_entry(files, file_name, hash_contents)
+            if entry is None:
+                entry = file_fingerprint(file_name, hash_contents)
+                entry['results'] = {}
+            entry.setdefault('results', {})[result_type] = value
+            files[os.path.abspath(file_name)] = entry
+            write_cache(cache_file, files)
+    except (IOError, OSError):
+        return
+
@@ -0,0 +1,454 @@
+#TFLOW Component: Transparent Reading of Compressed Sequence Files
+#
+#Dan Stribling
+#Florida State University
+#Center for Genomics and Personalized Medicine
+#Version 0.9, 04/20/2015
+#Project URL: http://www.github.com/fsugenomics/tflow
+
+import os
+import sys
+import gzip
+import zlib
+import struct
+import subprocess
+import threading
+import multiprocessing
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from distutils.spawn import find_executable
+from Queue import Queue
+
+from .util import print_except
+
+GZIP_MAGIC = '\x1f\x8b'
+ZSTD_MAGIC = '\x28\xb5\x2f\xfd'
+HEADER_READ_LENGTH = 18
+PIPE_BUFFER_SIZE = 1048576
+PREFETCH_BLOCK_SIZE = 1048576
+PREFETCH_QUEUE_DEPTH = 8
+
+# --- Format Detection ---
+
+#BGZF Files are gzip Files with a "BC" Extra Subfield Holding the Block Size
+def is_BGZF_header(header):
+    return (header.startswith(GZIP_MAGIC) and len(header) >= HEADER_READ_LENGTH
+            and bool(ord(header[3]) & 4) and header[12:14] == 'BC'
+            and header[14:16] == '\x02\x00')
+
+def is_gzip_header(header):
+    return header.startswith(GZIP_MAGIC)
+
+def is_zstd_header(header):
+    return header.startswith(ZSTD_MAGIC)
+
+def open_gzip(file_name):
+    return gzip.open(file_name, 'rb')
+
+def open_zstd(file_name):
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard.ZstdDecompressor().stream_reader(open(file_name, 'rb'))
+
+#Registered Formats, Checked in Order. For Each Format:
+#    detect:      Function Returning True if File Header Matches Format
+#    commands:    External Decompression Commands, First Found on PATH is Used
+#    python_open: In-Process Fallback Opener, Returning None if Unavailable
+COMPRESSION_FORMATS = OrderedDict()
+
+def register_compression_format(name, detect, commands=[], python_open=None):
+    COMPRESSION_FORMATS[name] = {'detect':detect,
+                                 'commands':[list(command) for command in commands],
+                                 'python_open':python_open}
+
+register_compression_format('bgzf', is_BGZF_header,
+                            commands=[['bgzip', '-dc'], ['pigz', '-dc'], ['gzip', '-dc']],
+                            python_open=open_gzip)
+register_compression_format('gzip', is_gzip_header,
+                            commands=[['pigz', '-dc'], ['gzip', '-dc']],
+                            python_open=open_gzip)
+register_compression_format('zstd', is_zstd_header,
+                            commands=[['zstd', '-dcq'], ['unzstd', '-c']],
+                            python_open=open_zstd)
+
+def detect_compression(file_name):
+    with open(file_name, 'rb') as file_object:
+        header = file_object.read(HEADER_READ_LENGTH)
+    for format_name in COMPRESSION_FORMATS:
+        if COMPRESSION_FORMATS[format_name]['detect'](header):
+            return format_name
+    return None
+
+def is_compressed(file_name):
+    return (detect_compression(file_name) is not None)
+
+COMPRESSED_FILE_SUFFIXES = ['.gz', '.bgz', '.bgzf', '.zst']
+
+#Return File Name Without a Compressed File Suffix, for Naming Uncompressed Output
+def strip_compression_suffix(file_name):
+    for suffix in COMPRESSED_FILE_SUFFIXES:
+        if file_name.endswith(suffix):
+            return file_name[:-len(suffix)]
+    return file_name
+
+
+# --- File Readers ---
+
+#Read Decompressed Output of an External Process, so Decompression Runs in Parallel
+class ProcessReader():
+    def __init__(self, command_list):
+        self.command_list = command_list
+        self.process = subprocess.Popen(command_list, stdout=subprocess.PIPE,
+                                        bufsize=PIPE_BUFFER_SIZE)
+        self.stream = self.process.stdout
+        self.finished = False
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        if not data or size < 0:
+            self.finished = True
+        return data
+
+    def readline(self):
+        line = self.stream.readline()
+        if not line:
+            self.finished = True
+        return line
+
+    def __iter__(self):
+        for line in self.stream:
+            yield line
+        self.finished = True
+
+    def close(self):
+        self.stream.close()
+        return_code = self.process.wait()
+        if self.finished and return_code != 0:
+            print_except('Decompression Command: %s ' % ' '.join(self.command_list)
+                         + 'Failed with Exit Code: %i' % return_code)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_type is not None:
+            self.finished = False
+        self.close()
+
+
+#Read a File Object in a Background Thread, Keeping Several Blocks Ready in a Queue
+class ThreadedReader():
+    def __init__(self, file_object, block_size=PREFETCH_BLOCK_SIZE,
+                 queue_depth=PREFETCH_QUEUE_DEPTH):
+        self.file_object = file_object
+        self.block_size = block_size
+        self.queue = Queue(queue_depth)
+        self.buffer = ''
+        self.finished = False
+        self.stopping = False
+        self.error = None
+        self.thread = threading.Thread(target=self._fill_queue)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _fill_queue(self):
+        try:
+            while not self.stopping:
+                block = self.file_object.read(self.block_size)
+                self.queue.put(block)
+                if not block:
+                    break
+        except Exception as error:
+            self.error = error
+            self.queue.put('')
+
+    def _next_block(self):
+        if self.finished:
+            return ''
+        block = self.queue.get()
+        if not block:
+            self.finished = True
+            if self.error is not None:
+                raise self.error
+        return block
+
+    def read(self, size=-1):
+        pieces = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            block = self._next_block()
+            if not block:
+                break
+            pieces.append(block)
+            length += len(block)
+        data = ''.join(pieces)
+        if size < 0:
+            self.buffer = ''
+            return data
+        self.buffer = data[size:]
+        return data[:size]
+
+    def __iter__(self):
+        while True:
+            block = self.buffer + self._next_block()
+            self.buffer = ''
+            if not block:
+                return
+            lines = block.split('\n')
+            self.buffer = lines.pop()
+            for line in lines:
+                yield line + '\n'
+            if self.finished and self.buffer:
+                yield self.buffer
+                self.buffer = ''
+                return
+
+    def close(self):
+        self.stopping = True
+        while self.thread.is_alive():
+            if self.queue.empty():
+                self.thread.join(0.01)
+            else:
+                self.queue.get()
+        self.file_object.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+
+#Open a Plain or Compressed File for Reading, Detecting Compression by Magic Bytes.
+#Compressed files are decompressed by an external process where one is available,
+#otherwise in-process by a background thread, so parsing overlaps with decompression.
+def open_sequence_file(file_name, mode='rb', use_process=True):
+    format_name = detect_compression(file_name)
+    if format_name is None:
+        return open(file_name, mode)
+
+    compression_format = COMPRESSION_FORMATS[format_name]
+    if use_process:
+        for command in compression_format['commands']:
+            if find_executable(command[0]):
+                return ProcessReader(command + [file_name])
+
+    if compression_format['python_open']:
+        file_object = compression_format['python_open'](file_name)
+        if file_object is not None:
+            return ThreadedReader(file_object)
+
+    print_except('No Decompressor Available for File: %s ' % file_name
+                 + 'with Compression Type: %s' % format_name)
+
+
+# --- Parallel Compression ---
+#Input is split into independent chunks that are compressed across a process pool and
+#written in order. As "gzip", each chunk is a complete gzip member, and the concatenated
+#members are a valid gzip file. As "bgzf", each chunk is a run of BGZF blocks of at most
+#BGZF_BLOCK_DATA_SIZE input bytes each, followed at the end by the standard BGZF EOF block,
+#so the output is readable by any gzip reader and can also be indexed for random access.
+COMPRESSION_CHUNK_SIZE = 4194304
+BGZF_BLOCK_DATA_SIZE = 65280
+BGZF_EOF = ('\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00\x1b\x00'
+            + '\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+COMPRESSED_FORMATS = ['gzip', 'bgzf']
+DEFAULT_COMPRESSION_LEVEL = 6
+
+def compress_gzip_member(data, level=DEFAULT_COMPRESSION_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def compress_BGZF_block(data, level=DEFAULT_COMPRESSION_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    deflated = compressor.compress(data) + compressor.flush()
+    block_size = len(deflated) + 25
+    header = struct.pack('<4BI2BH2BHH', 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, 
+                         block_size)
+    footer = struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data))
+    return header + deflated + footer
+
+#Compress One Chunk, Returning Compressed Data and a List of 
+#(Compressed Size, Uncompressed Size) Pairs for Each Block Within it
+def compress_chunk(chunk_arguments):
+    (data, compression_format, level) = chunk_arguments
+    if compression_format == 'bgzf':
+        blocks = [compress_BGZF_block(data[start:(start + BGZF_BLOCK_DATA_SIZE)], level)
+                  for start in xrange(0, len(data), BGZF_BLOCK_DATA_SIZE)]
+        block_sizes = [(len(block), min(BGZF_BLOCK_DATA_SIZE, len(data) - start)) 
+                       for (block, start) in zip(blocks, 
+                                                 xrange(0, len(data), BGZF_BLOCK_DATA_SIZE))]
+        return (''.join(blocks), block_sizes)
+    compressed = compress_gzip_member(data, level)
+    return (compressed, [(len(compressed), len(data))])
+
+#Compress File "in_file_name" to "out_file_name" in the Given Format Using Up to "max_CPU"
+#Processes. At most two chunks per process are held in memory at once.
+#Returns a Dictionary with Input Size, Output Size, and the Block Size List.
+def compress_file(in_file_name, out_file_name, compression_format='gzip', max_CPU=1, 
+                  level=DEFAULT_COMPRESSION_LEVEL, chunk_size=COMPRESSION_CHUNK_SIZE):
+    if compression_format not in COMPRESSED_FORMATS:
+        print_except('Unknown Compression Format: %s, ' % compression_format
+                     + 'Must be One of: %s' % ', '.join(COMPRESSED_FORMATS))
+    if compression_format == 'bgzf':
+        chunk_size -= chunk_size % BGZF_BLOCK_DATA_SIZE
+
+    processes = max(int(max_CPU), 1)
+    pool = (multiprocessing.Pool(processes) if processes > 1 else None)
+    pending = deque()
+    results = {'in_size':0, 'out_size':0, 'block_sizes':[]}
+
+    def write_result(chunk_result, out_file):
+        (compressed, block_sizes) = chunk_result
+        out_file.write(compressed)
+        results['out_size'] += len(compressed)
+        results['block_sizes'] += block_sizes
+
+    try:
+        with open(in_file_name, 'rb') as in_file, open(out_file_name, 'wb') as out_file:
+            while True:
+                data = in_file.read(chunk_size)
+                if not data:
+                    break
+                results['in_size'] += len(data)
+                chunk_arguments = (data, compression_format, level)
+                if pool is None:
+                    write_result(compress_chunk(chunk_arguments), out_file)
+                    continue
+                pending.append(pool.apply_async(compress_chunk, (chunk_arguments,)))
+                if len(pending) >= 2 * processes:
+                    write_result(pending.popleft().get(), out_file)
+
+            while pending:
+                write_result(pending.popleft().get(), out_file)
+
+            if compression_format == 'bgzf':
+                out_file.write(BGZF_EOF)
+                results['out_size'] += len(BGZF_EOF)
+            elif not results['in_size']:
+                empty_member = compress_gzip_member('', level)
+                out_file.write(empty_member)
+                results['out_size'] += len(empty_member)
+    except:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if os.path.isfile(out_file_name):
+            os.remove(out_file_name)
+        raise
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+    return results
+
+
+# --- BGZF Random Access ---
+#BGZF block index files (".gzi", as written by "bgzip -i") hold a little-endian 64-bit count
+#followed by (compressed offset, uncompressed offset) pairs for the start of every block
+#after the first.
+BGZF_INDEX_SUFFIX = '.gzi'
+BGZF_HEADER_LENGTH = 18
+
+def BGZF_index_name(file_name):
+    return file_name + BGZF_INDEX_SUFFIX
+
+#Convert (Compressed Size, Uncompressed Size) Block List to Block Start Offsets
+def BGZF_block_offsets(block_sizes):
+    offsets = [(0, 0)]
+    (compressed_offset, uncompressed_offset) = (0, 0)
+    for (compressed_size, uncompressed_size) in block_sizes:
+        compressed_offset += compressed_size
+        uncompressed_offset += uncompressed_size
+        offsets.append((compressed_offset, uncompressed_offset))
+    return (offsets[:len(block_sizes)] or [(0, 0)])
+
+def write_BGZF_index(block_offsets, index_file_name):
+    with open(index_file_name, 'wb') as index_file:
+        index_file.write(struct.pack('<Q', len(block_offsets) - 1))
+        for offset_pair in block_offsets[1:]:
+            index_file.write(struct.pack('<QQ', *offset_pair))
+
+def read_BGZF_index(index_file_name):
+    with open(index_file_name, 'rb') as index_file:
+        data = index_file.read()
+    (entry_count,) = struct.unpack('<Q', data[:8])
+    values = struct.unpack('<%iQ' % (2 * entry_count), data[8:(8 + 16 * entry_count)])
+    return [(0, 0)] + zip(values[0::2], values[1::2])
+
+#Build Block Offsets by Walking the BGZF Block Headers, Without Decompressing
+def build_BGZF_index(file_name):
+    block_offsets = []
+    (compressed_offset, uncompressed_offset) = (0, 0)
+    with open(file_name, 'rb') as file_object:
+        while True:
+            header = file_object.read(BGZF_HEADER_LENGTH)
+            if not header:
+                break
+            if not is_BGZF_header(header):
+                print_except('File: %s is Not a BGZF File, ' % file_name
+                             + 'Block at Offset %i Not Recognized.' % compressed_offset)
+            (block_size,) = struct.unpack('<H', header[16:18])
+            file_object.seek(compressed_offset + block_size - 3)
+            (data_size,) = struct.unpack('<I', file_object.read(4))
+            if data_size:
+                block_offsets.append((compressed_offset, uncompressed_offset))
+            compressed_offset += block_size + 1
+            uncompressed_offset += data_size
+    return block_offsets or [(0, 0)]
+
+#Return BGZF Block Offsets from the ".gzi" File if Current, Otherwise by Scanning Blocks
+def load_BGZF_index(file_name):
+    index_file_name = BGZF_index_name(file_name)
+    if (os.path.isfile(index_file_name) 
+        and os.path.getmtime(index_file_name) >= os.path.getmtime(file_name)):
+        return read_BGZF_index(index_file_name)
+    return build_BGZF_index(file_name)
+
+
+#Random Access to the Uncompressed Contents of a BGZF File.
+#Slicing with uncompressed byte offsets (reader[start:end]) decompresses only the
+#blocks covering the range, and the most recently used block is kept for reuse.
+class BGZFReader():
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.block_offsets = load_BGZF_index(file_name)
+        self.uncompressed_starts = [offset[1] for offset in self.block_offsets]
+        self.file_object = open(file_name, 'rb')
+        self.cached_block = (None, '')
+
+    def _read_block(self, block_number):
+        if self.cached_block[0] == block_number:
+            return self.cached_block[1]
+        self.file_object.seek(self.block_offsets[block_number][0])
+        header = self.file_object.read(BGZF_HEADER_LENGTH)
+        (block_size,) = struct.unpack('<H', header[16:18])
+        payload = self.file_object.read(block_size + 1 - BGZF_HEADER_LENGTH)
+        data = zlib.decompress(payload[:-8], -15)
+        self.cached_block = (block_number, data)
+        return data
+
+    def read_range(self, start, end):
+        pieces = []
+        block_number = max(bisect_right(self.uncompressed_starts, start) - 1, 0)
+        position = start
+        while position < end and block_number < len(self.block_offsets):
+            block_start = self.uncompressed_starts[block_number]
+            data = self._read_block(block_number)
+            pieces.append(data[(position - block_start):(end - block_start)])
+            position = block_start + len(data)
+            block_number += 1
+        return ''.join(pieces)
+
+    def close(self):
+        self.file_object.close()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.read_range(key.start or 0, key.stop)
+        return self.read_range(key, key + 1)
+
+    def __getslice__(self, start, end):
+        return self.read_range(start, end)
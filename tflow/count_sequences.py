@@ -1,6 +1,6 @@
 #!/usr/bin/env python2.7
 #TFLOW Utility: Count sequences in one or more .fasta[.gz], .fastq[.gz], .fna etc... files.
-#Usage: "count_sequences.py [sequence_file_1.fa] [sequence_file....]"
+#Usage: "count_sequences.py [--jobs N] [sequence_file_1.fa] [sequence_file....]"
 #For Full Usage: "count_sequences.py -h"
 #
 #Dan Stribling
@@ -11,6 +11,7 @@
 
 import argparse
 import os
+import multiprocessing
 
 if __name__ == "__main__" and __package__ is None:
     import sys
@@ -26,6 +27,11 @@ def parse_count_sequences_args():
                                      description='Count Sequences in Sequence Files')
     parser.add_argument('contents', action='store', nargs='*', default=[], 
                         help='Input Sequence File(s)', metavar='SEQUENCE_FILE')
+    parser.add_argument('-j', '--jobs', action='store', type=int, default=1,
+                        help='Number of Files to Count in Parallel', metavar='N')
+    parser.add_argument('--max_CPU', action='store', type=int, 
+                        default=multiprocessing.cpu_count(),
+                        help='Maximum Number of CPU\'s to Use (Default: All)', metavar='#CPU')
     return vars(parser.parse_args())
 
 if __name__ == '__main__':
@@ -46,4 +52,4 @@ if __name__ == '__main__':
     if not contents:
         util.print_exit(['No Sequence Files Found.', ''], 1)
 
-    util.count_sequences(contents)
+    util.count_sequences(contents, jobs=options['jobs'], max_CPU=options['max_CPU'])
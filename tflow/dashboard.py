@@ -0,0 +1,183 @@
+#TFLOW Component: Dashboard Tracking All Active Steps of One or Many Projects
+#
+#Dan Stribling
+#Florida State University
+#Center for Genomics and Personalized Medicine
+#Version 0.9, 04/20/2015
+#Project URL: http://www.github.com/fsugenomics/tflow
+
+import os
+import sys
+from datetime import datetime
+from time import sleep, time, mktime
+
+from .util import read_file
+from .watch import FileWatcher
+
+DASHBOARD_REFRESH_INTERVAL = 10
+MIN_UPDATE_INTERVAL = 1
+LAST_LINE_WIDTH = 40
+TIMING_SUFFIX = '.auto.timing'
+FINISHED_STATUSES = ['Complete', 'Failed']
+CLEAR_SCREEN = '\033[H\033[2J'
+
+#Return Start Time of a Running Step from its Timing File, or None if Not Running or Unknown
+def timing_start_time(timing_file_name):
+    try:
+        contents = read_file(timing_file_name)
+    except IOError:
+        return None
+    if 'End Time:' in contents:
+        return None
+    for line in contents.splitlines():
+        if line.startswith('Start Time:'):
+            start = line.split(':', 1)[1].strip()
+            for time_format in ['%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S']:
+                try:
+                    return mktime(datetime.strptime(start, time_format).timetuple())
+                except ValueError:
+                    pass
+    return None
+
+def format_duration(seconds):
+    (minutes, seconds) = divmod(int(seconds), 60)
+    (hours, minutes) = divmod(minutes, 60)
+    return '%i:%02i:%02i' % (hours, minutes, seconds)
+
+#Progress of One Step, Followed with the Step Segment's Output Parser. Output is read
+#only when the file changes, from the byte offset already read through.
+class StepProgress():
+    def __init__(self, project, step, parser, timing_file_name):
+        self.project = project
+        self.step = step
+        self.parser = parser
+        self.timing_file_name = timing_file_name
+        self.status = 'Waiting'
+        self.start_time = None
+        self.first_seen_time = None
+        self.first_seen_index = 0
+
+    #Read New Output and Update Status, Return True if Anything Shown Has Changed
+    def update(self):
+        if self.status in FINISHED_STATUSES or not self.parser.output_exists():
+            return False
+        previous = (self.status, self.parser.next_milestone_index, self.parser.last_line)
+        if self.status == 'Waiting':
+            self.start_time = timing_start_time(self.timing_file_name)
+            #Completed Steps are Recognized from the End of Output, Without Reading it All
+            if self.parser.check_completion(failure_exit=False):
+                self.status = 'Complete'
+                return True
+
+        (line_count, running, failed) = self.parser.update()
+        if failed:
+            self.status = 'Failed'
+        elif not running:
+            self.status = 'Complete'
+        else:
+            self.status = 'Running'
+        if self.first_seen_time is None:
+            self.first_seen_time = time()
+            self.first_seen_index = self.parser.next_milestone_index
+        return previous != (self.status, self.parser.next_milestone_index,
+                            self.parser.last_line)
+
+    #Milestones Reached per Second Since the Step Started, if Known from its Timing File,
+    #Otherwise Since it Was First Seen. Returns None Until a Milestone is Reached.
+    def milestone_rate(self, now):
+        if self.start_time and self.start_time <= self.first_seen_time:
+            reached = self.parser.next_milestone_index
+            elapsed = now - self.start_time
+        else:
+            reached = self.parser.next_milestone_index - self.first_seen_index
+            elapsed = now - (self.first_seen_time or now)
+        if reached <= 0 or elapsed <= 0:
+            return None
+        return reached / float(elapsed)
+
+    def row(self, now):
+        if self.status == 'Complete':
+            return [self.project, self.step, self.status, '100%', '-', '-', '-', '-']
+        if self.status == 'Waiting':
+            return [self.project, self.step, self.status, '-', '-', '-', '-', '-']
+
+        rate = self.milestone_rate(now)
+        remaining = len(self.parser.milestones) - self.parser.next_milestone_index
+        last_line = self.parser.last_line.split('\r')[-1].strip()
+        if len(last_line) > LAST_LINE_WIDTH:
+            last_line = last_line[:LAST_LINE_WIDTH - 3] + '...'
+        return [self.project, self.step, self.status,
+                (self.parser.completion_percent().split('%')[0] + '%' 
+                 if self.status == 'Running' else '-'),
+                self.parser.current_milestone,
+                ('%.1f/h' % (rate * 3600) if rate else '-'),
+                (format_duration(remaining / rate) if rate and self.status == 'Running'
+                 else '-'),
+                last_line]
+
+
+#Follow Any Number of Steps in a Single Loop, Waiting on One File Watcher for All Output
+#Files. Only changed files are read, updates are handled at most once per
+#MIN_UPDATE_INTERVAL seconds, and the table is redrawn when progress changes or every
+#"refresh_interval" seconds, so the cost does not grow with time between changes.
+class Dashboard():
+    def __init__(self, steps, refresh_interval=DASHBOARD_REFRESH_INTERVAL,
+                 poll_interval=5, use_inotify=True):
+        self.steps = steps
+        self.refresh_interval = refresh_interval
+        self.watcher = FileWatcher(poll_interval, use_inotify=use_inotify)
+        self.steps_by_file = {}
+        for step in steps:
+            out_file = os.path.abspath(step.parser.out_file)
+            self.steps_by_file.setdefault(out_file, []).append(step)
+            self.watcher.add(out_file)
+        self.start_time = time()
+
+    def finished(self):
+        return all(step.status in FINISHED_STATUSES for step in self.steps)
+
+    def table(self):
+        now = time()
+        header = ['Project', 'Step', 'Status', 'Done', 'Milestone', 'Rate', 'ETA', 'Last Line']
+        rows = [step.row(now) for step in self.steps]
+        widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+        lines = ['  '.join(item.ljust(width) for (item, width) in zip(row, widths)).rstrip()
+                 for row in [header] + rows]
+        counts = dict((status, len([step for step in self.steps if step.status == status]))
+                      for status in ['Running', 'Waiting', 'Complete', 'Failed'])
+        lines += ['', ('Steps: %i  Running: %i  Waiting: %i  Complete: %i  Failed: %i'
+                       % (len(self.steps), counts['Running'], counts['Waiting'],
+                          counts['Complete'], counts['Failed']))
+                      + '  (Watching for %s)' % format_duration(now - self.start_time)]
+        return '\n'.join(lines)
+
+    def draw(self):
+        if sys.stdout.isatty():
+            sys.stdout.write(CLEAR_SCREEN)
+        print self.table()
+        print ''
+        sys.stdout.flush()
+
+    #Track Until All Steps are Complete or Failed. Returns True if None Failed.
+    def run(self):
+        try:
+            for step in self.steps:
+                step.update()
+            self.draw()
+            last_draw_time = time()
+            while not self.finished():
+                update_time = time()
+                changed_files = self.watcher.wait(self.refresh_interval)
+                changed = False
+                for out_file in changed_files:
+                    for step in self.steps_by_file.get(out_file, []):
+                        changed = step.update() or changed
+                if changed or time() - last_draw_time >= self.refresh_interval:
+                    self.draw()
+                    last_draw_time = time()
+                #Output Written Continuously is Read in Batches, Not Line by Line
+                if time() - update_time < MIN_UPDATE_INTERVAL:
+                    sleep(MIN_UPDATE_INTERVAL - (time() - update_time))
+        finally:
+            self.watcher.close()
+        return not any(step.status == 'Failed' for step in self.steps)
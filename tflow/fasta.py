@@ -9,9 +9,809 @@
 import os.path
 import sys
 import re
+import time
+import hashlib
+import mmap
 
+from array import array
 from collections import OrderedDict
+from itertools import chain
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from .util import print_except, print_exit, SI_prefix, percent_string, is_FASTA, is_FASTQ
+from .compression import (open_sequence_file, is_compressed, detect_compression, BGZFReader,
+                          strip_compression_suffix)
+from .cache import get_result, store_result
+
+
+#Compact Sequence Storage Class
+#Packs the contents of all sequences into one contiguous buffer, with parallel arrays
+#holding the offset and length of each record and a dictionary from name to record index.
+#Supports the subset of the (Ordered) dictionary interface used by FASTA_DB.
+class SequenceStore():
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.buffer = bytearray()
+        self.offsets = array('L')
+        self.lengths = array('L')
+        self.names = []
+        self.index = {}
+        self.deleted_records = 0
+        self.unused_bytes = 0
+
+    def length(self, name):
+        return self.lengths[self.index[name]]
+
+    def view(self, name):
+        record_index = self.index[name]
+        start = self.offsets[record_index]
+        return memoryview(self.buffer)[start:(start + self.lengths[record_index])]
+
+    def keys(self):
+        return [name for name in self.names if name is not None]
+
+    def values(self):
+        return [self[name] for name in self.keys()]
+
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
+
+    def iteritems(self):
+        for name in self.keys():
+            yield (name, self[name])
+
+    def rename(self, name, new_name):
+        if name == new_name:
+            return
+        record_index = self.index.pop(name)
+        if new_name in self.index:
+            self._remove(self.index[new_name])
+        self.names[record_index] = new_name
+        self.index[new_name] = record_index
+
+    #Rebuild Buffer Without Space Left by Deleted or Replaced Records
+    def compact(self):
+        names = self.keys()
+        old_buffer, old_offsets, old_lengths, old_index = (self.buffer, self.offsets, 
+                                                           self.lengths, self.index)
+        self.clear()
+        for name in names:
+            old_record_index = old_index[name]
+            start = old_offsets[old_record_index]
+            end = start + old_lengths[old_record_index]
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.offsets.append(len(self.buffer))
+            self.lengths.append(end - start)
+            self.buffer += old_buffer[start:end]
+
+    def _remove(self, record_index):
+        del(self.index[self.names[record_index]])
+        self.names[record_index] = None
+        self.deleted_records += 1
+        self.unused_bytes += self.lengths[record_index]
+
+    def _check_compact(self):
+        if self.unused_bytes > 1000000 and self.unused_bytes > (len(self.buffer) / 2):
+            self.compact()
+
+    # --Python Magic Methods--
+    def __setitem__(self, name, contents):
+        if name in self.index:
+            record_index = self.index[name]
+            self.unused_bytes += self.lengths[record_index]
+            self.offsets[record_index] = len(self.buffer)
+            self.lengths[record_index] = len(contents)
+        else:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.offsets.append(len(self.buffer))
+            self.lengths.append(len(contents))
+        self.buffer += contents
+        self._check_compact()
+
+    def __getitem__(self, name):
+        record_index = self.index[name]
+        start = self.offsets[record_index]
+        return str(self.buffer[start:(start + self.lengths[record_index])])
+
+    def __delitem__(self, name):
+        self._remove(self.index[name])
+        self._check_compact()
+
+    # Iteration is over a snapshot of names, so records may be removed while iterating.
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.index)
+
+    def __nonzero__(self):
+        return bool(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __eq__(self, other):
+        if not isinstance(other, SequenceStore):
+            return False
+        if self.keys() != other.keys():
+            return False
+        return all(self[name] == other[name] for name in self.keys())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+
+#Size of Blocks Read at Once When Parsing FASTA Files
+FASTA_BLOCK_SIZE = 4194304
+WHITESPACE_CHARACTERS = (' ', '\t', '\r', '\x0b', '\x0c')
+
+#Yield Blocks of Text from a FASTA File, Split on "\n>" Sequence Boundaries.
+#Each block is returned with a flag for whether it is the final block of the file.
+#If a single record is larger than the block size, read size grows to keep reading linear.
+def iter_FASTA_blocks(file_object, block_size=FASTA_BLOCK_SIZE):
+    carry = ''
+    read_size = block_size
+    while True:
+        block = file_object.read(read_size)
+        if not block:
+            if carry:
+                yield (carry, True)
+            return
+
+        if carry:
+            block = carry + block
+
+        boundary = block.rfind('\n>')
+        if boundary == -1:
+            carry = block
+            read_size = max(block_size, len(carry))
+        else:
+            yield (block[:(boundary + 1)], False)
+            carry = block[(boundary + 1):]
+            read_size = block_size
+
+
+#Return Number of Lines in Sequence Body if All Lines but the Last Have Equal Width
+#and No Line Begins or Ends in Whitespace, Otherwise Return 0.
+def regular_line_count(body):
+    if not body:
+        return 0
+    width = body.find('\n')
+    if width == -1:
+        edge_characters = body[0] + body[-1]
+        line_count = 1
+    elif width == 0:
+        return 0
+    else:
+        newlines = body[width::(width + 1)]
+        if (newlines.count('\n') != len(newlines) or body[-1] == '\n'
+            or body.count('\n') != len(newlines)):
+            return 0
+        edge_characters = (body[0] + body[-1] + body[(width - 1)::(width + 1)] 
+                           + body[(width + 1)::(width + 1)])
+        line_count = len(newlines) + 1
+    if any(character in edge_characters for character in WHITESPACE_CHARACTERS):
+        return 0
+    return line_count
+
+
+#Block-Based FASTA Record Parser
+#Iterating over an instance yields (name, contents, header_line_number) for each record,
+#joining the lines of each sequence once. Leading ";" header lines are collected in header.
+class FASTA_Reader():
+    def __init__(self, file_object, file_name='', block_size=FASTA_BLOCK_SIZE,
+                 except_extra_lines=True):
+        self.file_object = file_object
+        self.file_name = file_name
+        self.block_size = block_size
+        self.except_extra_lines = except_extra_lines
+        self.header = ''
+        self.line_count = 0
+        self.sequence_count = 0
+        self.warnings = []
+
+    def __iter__(self):
+        in_header = True
+        first_record = True
+        for (block, final_block) in iter_FASTA_blocks(self.file_object, self.block_size):
+            if in_header:
+                block = self._read_header(block)
+                if not block:
+                    continue
+                in_header = False
+
+                if not block.startswith('>'):
+                    print_except('FASTA File %s Formatted Incorrectly, ' % self.file_name
+                                 + 'Header Space Found at line %i.' % (self.line_count + 1))
+
+            block_length = len(block)
+            if block.endswith('\n'):
+                block_length -= 1
+
+            position = 0
+            while position < block_length:
+                record_end = block.find('\n>', position, block_length)
+                if record_end == -1:
+                    record_end = block_length
+                header_end = block.find('\n', position, record_end)
+                header_line = self.line_count + 1
+
+                #Fast Path: Regularly wrapped sequence lines are joined in one step.
+                if header_end != -1 and not first_record:
+                    body = block[(header_end + 1):record_end]
+                    body_line_count = regular_line_count(body)
+                    if body_line_count:
+                        self.line_count += body_line_count + 1
+                        self.sequence_count += 1
+                        yield (block[position:header_end].lstrip('>').strip(),
+                               body.replace('\n', ''), header_line)
+                        position = record_end + 2
+                        continue
+
+                lines = block[position:record_end].split('\n')
+                self.line_count += len(lines)
+
+                #The first "contents" line of the file is not checked for blank space.
+                checked_index = 0
+                if first_record:
+                    first_record = False
+                    if len(lines) == 1:
+                        if final_block and record_end == block_length:
+                            return
+                        print_except('FASTA File %s Formatted Incorrectly, ' % self.file_name
+                                     + 'First "Contents" line at line '
+                                     + '%i is also a sequence header.' % (header_line + 1))
+                    checked_index = 1
+
+                contents_lines = [line.strip() for line in lines[1:]]
+                if '' in contents_lines[checked_index:]:
+                    contents_lines = (contents_lines[:checked_index]
+                                      + self._remove_blank_lines(contents_lines[checked_index:], 
+                                                                 header_line + 1 + checked_index))
+
+                self.sequence_count += 1
+                yield (lines[0].lstrip('>').strip(), ''.join(contents_lines), header_line)
+                position = record_end + 2
+
+    #Remove ";" Header Lines from Start of Block, Returning Remainder
+    def _read_header(self, block):
+        while block.startswith(';'):
+            line_end = block.find('\n')
+            if line_end == -1:
+                line_end = len(block)
+            self.header += block[:line_end].lstrip(';') + '\n'
+            self.line_count += 1
+            block = block[(line_end + 1):]
+        return block
+
+    def _remove_blank_lines(self, contents_lines, first_line_number):
+        kept_lines = []
+        for (line_index, line) in enumerate(contents_lines, start=first_line_number):
+            if line:
+                kept_lines.append(line)
+            elif self.except_extra_lines:
+                print_except('FASTA File %s Formatted Incorrectly, Blank Line ' % self.file_name
+                             + 'Found at Line %i.' % line_index)
+            else:
+                self.warnings.append('FASTA File %s Formatted Incorrectly, ' % self.file_name
+                                     + 'Blank Line Found at Line %i.' % line_index)
+                print >> sys.stderr, ('ERROR: Blank Line Found '
+                                      + 'at Line %i.' % line_index)
+        return kept_lines
+
+
+#Buffered FASTA Writer
+#Records are added as (name, sequence) pairs, individually with write() or from any iterable
+#with write_records(), and collected into large batches that are written in one call.
+#Sequences are wrapped at "line_width" characters per line, or left unwrapped if 0.
+#Accepts a file name or an open file object, and can be used as a context manager.
+FASTA_LINE_WIDTH = 60
+
+class FASTA_Writer():
+    def __init__(self, file_target, line_width=FASTA_LINE_WIDTH, header='', 
+                 block_size=FASTA_BLOCK_SIZE):
+        if isinstance(file_target, basestring):
+            self.file_name = file_target
+            self.file_object = open(file_target, 'wb')
+            self.owns_file = True
+        else:
+            self.file_name = getattr(file_target, 'name', '')
+            self.file_object = file_target
+            self.owns_file = False
+        self.line_width = line_width
+        self.block_size = block_size
+        self.pieces = []
+        self.pending_length = 0
+        self.sequence_count = 0
+        self.closed = False
+        if header:
+            for line in header.splitlines(False):
+                self.pieces.append(';' + line + '\n')
+
+    def write(self, name, sequence):
+        self.pieces.append('>' + name + '\n')
+        sequence_length = len(sequence)
+        line_width = self.line_width
+        if not line_width or sequence_length <= line_width:
+            self.pieces.append(sequence)
+        else:
+            self.pieces.append('\n'.join([sequence[start:(start + line_width)] for start 
+                                          in xrange(0, sequence_length, line_width)]))
+        self.pieces.append('\n')
+        self.sequence_count += 1
+        self.pending_length += sequence_length + len(name)
+        if self.pending_length >= self.block_size:
+            self.flush()
+
+    def write_records(self, records):
+        for (name, sequence) in records:
+            self.write(name, sequence)
+        return self.sequence_count
+
+    def flush(self):
+        if self.pieces:
+            self.file_object.write(''.join(self.pieces))
+            self.pieces = []
+            self.pending_length = 0
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        if self.owns_file:
+            self.file_object.close()
+        else:
+            self.file_object.flush()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+
+# --- FASTA Index ---
+#Index files hold one line per sequence with the fields:
+#    name, length, offset, line_bases, line_width, span
+#following the columns of a samtools ".fai" index, with span giving the number of bytes
+#from offset to the end of the sequence contents. line_bases and line_width are 0 for
+#irregularly wrapped sequences. The first line records the size and modification time of
+#the indexed file, and the index is rebuilt when either changes. Offsets are always into the
+#uncompressed contents, so an index of a BGZF file is used together with its block index.
+FASTA_INDEX_SUFFIX = '.tflow.fai'
+FASTA_INDEX_HEADER = '#TFLOW_FASTA_INDEX'
+
+def FASTA_index_name(file_name):
+    return file_name + FASTA_INDEX_SUFFIX
+
+def file_fingerprint(file_name):
+    file_stat = os.stat(file_name)
+    return (str(file_stat.st_size), repr(file_stat.st_mtime))
+
+def build_FASTA_index(file_name, block_size=FASTA_BLOCK_SIZE):
+    index = OrderedDict()
+    block_offset = 0
+    in_header = True
+    file_object = open_sequence_file(file_name)
+    try:
+        for (block, final_block) in iter_FASTA_blocks(file_object, block_size):
+            position = 0
+            if in_header:
+                while block.startswith(';', position):
+                    line_end = block.find('\n', position)
+                    position = (len(block) if line_end == -1 else line_end + 1)
+                if position >= len(block):
+                    block_offset += len(block)
+                    continue
+                in_header = False
+                if not block.startswith('>', position):
+                    print_except('FASTA File %s Formatted Incorrectly, ' % file_name
+                                 + 'Header Space Found Before First Sequence.')
+
+            content_end = len(block)
+            if block.endswith('\n'):
+                content_end -= 1
+
+            while position < content_end:
+                record_end = block.find('\n>', position, content_end)
+                if record_end == -1:
+                    record_end = content_end
+                header_end = block.find('\n', position, record_end)
+                if header_end == -1:
+                    header_end = record_end
+                    body_start = record_end
+                else:
+                    body_start = header_end + 1
+                name = block[position:header_end].lstrip('>').strip()
+                body = block[body_start:record_end]
+
+                line_count = regular_line_count(body)
+                if line_count:
+                    length = len(body) - (line_count - 1)
+                    line_bases = (body.find('\n') if line_count > 1 else len(body))
+                    line_width = line_bases + 1
+                else:
+                    length = sum(len(line.strip()) for line in body.split('\n'))
+                    line_bases = 0
+                    line_width = 0
+
+                if name in index:
+                    print >> sys.stderr, ('ERROR: Repeated Sequence Header: %s ' % name
+                                          + 'Not Indexed.')
+                else:
+                    index[name] = (length, (block_offset + body_start), line_bases, 
+                                   line_width, (record_end - body_start))
+                position = record_end + 2
+
+            block_offset += len(block)
+    finally:
+        file_object.close()
+    return index
+
+def write_FASTA_index(file_name, index, index_file_name=None):
+    if index_file_name is None:
+        index_file_name = FASTA_index_name(file_name)
+    with open(index_file_name, 'w') as index_file:
+        index_file.write('\t'.join([FASTA_INDEX_HEADER] + list(file_fingerprint(file_name)))
+                         + '\n')
+        for name in index:
+            index_file.write('\t'.join([name] + [str(x) for x in index[name]]) + '\n')
+
+#Read Index File, Returning None if Missing or Out of Date
+def read_FASTA_index(file_name, index_file_name=None):
+    if index_file_name is None:
+        index_file_name = FASTA_index_name(file_name)
+    if not os.path.isfile(index_file_name):
+        return None
+
+    index = OrderedDict()
+    with open(index_file_name, 'r') as index_file:
+        header = index_file.readline().rstrip('\n').split('\t')
+        if header != [FASTA_INDEX_HEADER] + list(file_fingerprint(file_name)):
+            return None
+        for line in index_file:
+            split_line = line.rstrip('\n').rsplit('\t', 5)
+            index[split_line[0]] = tuple(int(x) for x in split_line[1:])
+    return index
+
+#Return Current Index for File, Building and Saving it if Necessary
+def load_FASTA_index(file_name, write=True):
+    index = read_FASTA_index(file_name)
+    if index is not None:
+        return index
+
+    print 'Indexing File: %s' % file_name
+    index = build_FASTA_index(file_name)
+    if write:
+        try:
+            write_FASTA_index(file_name, index)
+        except IOError as error:
+            print >> sys.stderr, ('ERROR: Index File for %s ' % file_name
+                                  + 'Could Not Be Written: %s' % error.strerror)
+    return index
+
+
+#Lazy Indexed Sequence Access Class
+#Read-only counterpart to SequenceStore that fetches sequences by name from a memory-mapped
+#FASTA file using its index, so only requested sequences are ever read. BGZF-compressed 
+#files are read through their block index, decompressing only the blocks needed.
+class IndexedSequences():
+    def __init__(self, file_name):
+        compression_format = detect_compression(file_name)
+        if compression_format not in [None, 'bgzf']:
+            print_except('Indexed Access Requires an Uncompressed or BGZF FASTA File: '
+                         + '%s' % file_name)
+        self.file_name = file_name
+        self.index = load_FASTA_index(file_name)
+        self.file_object = None
+        if compression_format == 'bgzf':
+            self.data = BGZFReader(file_name)
+        elif os.path.getsize(file_name):
+            self.file_object = open(file_name, 'rb')
+            self.data = mmap.mmap(self.file_object.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = ''
+
+    def length(self, name):
+        return self.index[name][0]
+
+    #Return Sequence Contents, or the Subsequence From Base "start" up to Base "end"
+    def fetch(self, name, start=0, end=None):
+        (length, offset, line_bases, line_width, span) = self.index[name]
+        start = max(start, 0)
+        if end is None or end > length:
+            end = length
+        if start >= end:
+            return ''
+
+        if line_bases and line_width == line_bases + 1:
+            byte_start = offset + (start / line_bases) * line_width + (start % line_bases)
+            byte_end = offset + (end / line_bases) * line_width + (end % line_bases)
+            return self.data[byte_start:byte_end].replace('\n', '')
+
+        contents = ''.join(line.strip() for line in 
+                           self.data[offset:(offset + span)].split('\n'))
+        return contents[start:end]
+
+    def keys(self):
+        return self.index.keys()
+
+    def iteritems(self):
+        for name in self.index:
+            yield (name, self.fetch(name))
+
+    def close(self):
+        if isinstance(self.data, (mmap.mmap, BGZFReader)):
+            self.data.close()
+        if self.file_object:
+            self.file_object.close()
+
+    def _read_only(self, *args):
+        print_except('Indexed Sequences from File: %s Cannot Be Modified.' % self.file_name)
+
+    rename = _read_only
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+
+    # --Python Magic Methods--
+    def __getitem__(self, name):
+        return self.fetch(name)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __nonzero__(self):
+        return bool(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+
+# --- Sequence Statistics ---
+#Single-Pass Sequence Statistics Accumulator
+#Sequences are added one at a time into a histogram of sequence lengths, from which the
+#count, total, mean, median, Nx/NGx/Lx, and range are computed, along with the names of the 
+#shortest and longest sequences and, when sequence contents are given, GC content.
+#Median and Nx follow the original TFLOW definitions, accumulating from the shortest length.
+#When NumPy is available, order statistics are computed with cumulative sums and binary
+#searches over the histogram arrays, otherwise with equivalent pure-Python loops.
+class SequenceStats():
+    def __init__(self, genome_size=None, use_numpy=True):
+        self.genome_size = genome_size
+        self.use_numpy = (use_numpy and numpy is not None)
+        self.length_counts = {}
+        self.count = 0
+        self.total_length = 0
+        self.shortest = None
+        self.longest = None
+        self.gc_count = 0
+        self.at_count = 0
+        self.arrays = None
+
+    def add(self, name, length):
+        if length in self.length_counts:
+            self.length_counts[length] += 1
+        else:
+            self.length_counts[length] = 1
+        self.count += 1
+        self.total_length += length
+        if self.shortest is None or length < self.shortest[0]:
+            self.shortest = (length, name)
+        if self.longest is None or length > self.longest[0]:
+            self.longest = (length, name)
+        self.arrays = None
+
+    def add_sequence(self, name, contents):
+        self.add(name, len(contents))
+        self.gc_count += len(contents) - len(contents.translate(None, 'GCSgcs'))
+        self.at_count += len(contents) - len(contents.translate(None, 'ATUWatuw'))
+
+    def sorted_lengths(self):
+        return sorted(self.length_counts.keys())
+
+    #Ascending Lengths with Cumulative Sequence Counts and Cumulative Total Lengths
+    def _length_arrays(self):
+        if self.arrays is None:
+            lengths = numpy.array(self.sorted_lengths(), dtype=numpy.int64)
+            counts = numpy.array([self.length_counts[length] for length in lengths], 
+                                 dtype=numpy.int64)
+            self.arrays = (lengths, numpy.cumsum(counts), numpy.cumsum(lengths * counts))
+        return self.arrays
+
+    def mean(self):
+        if not self.count:
+            return 0
+        return self.total_length / self.count
+
+    def median(self):
+        if not self.count:
+            return 0
+        median_index = self.count / 2
+        if self.use_numpy:
+            (lengths, cumulative_counts, cumulative_lengths) = self._length_arrays()
+            return int(lengths[numpy.searchsorted(cumulative_counts, median_index)])
+
+        encountered = 0
+        for length in self.sorted_lengths():
+            encountered += self.length_counts[length]
+            if encountered >= median_index:
+                return length
+
+    #Length at Which Sequences of That Length or Longer Hold x Percent of Total Length
+    def Nx(self, x):
+        return self.Nx_values([x])[0]
+
+    #Nx Lengths for Several Values of x at Once
+    def Nx_values(self, x_values):
+        if not self.count:
+            return [0 for x in x_values]
+        targets = [self.total_length * (100 - x) / 100 for x in x_values]
+        if self.use_numpy:
+            (lengths, cumulative_counts, cumulative_lengths) = self._length_arrays()
+            indexes = numpy.searchsorted(cumulative_lengths, targets)
+            return [int(length) for length in lengths[indexes]]
+
+        nx_lengths = []
+        for target in targets:
+            encountered = 0
+            for length in self.sorted_lengths():
+                encountered += length * self.length_counts[length]
+                if encountered >= target:
+                    nx_lengths.append(length)
+                    break
+        return nx_lengths
+
+    #Number of Sequences With Length of at Least Nx
+    def Lx(self, x):
+        return self.Lx_values([x])[0]
+
+    def Lx_values(self, x_values):
+        nx_lengths = self.Nx_values(x_values)
+        if self.use_numpy and self.count:
+            (lengths, cumulative_counts, cumulative_lengths) = self._length_arrays()
+            shorter_counts = numpy.concatenate(([0], cumulative_counts))
+            indexes = numpy.searchsorted(lengths, nx_lengths)
+            return [int(self.count - shorter) for shorter in shorter_counts[indexes]]
+
+        return [sum(self.length_counts[length] for length in self.length_counts 
+                    if length >= nx_length) for nx_length in nx_lengths]
+
+    #As Nx, but Relative to Expected Genome Size, None if Total Length is Insufficient
+    def NGx(self, x, genome_size=None):
+        if genome_size is None:
+            genome_size = self.genome_size
+        if not genome_size or not self.count:
+            return None
+        target = genome_size * x / 100
+        if self.use_numpy:
+            #Longest-First Total Down to Each Length Reaches Target While the
+            #Total of All Shorter Lengths is No More than (Total - Target)
+            (lengths, cumulative_counts, cumulative_lengths) = self._length_arrays()
+            remainder = self.total_length - target
+            if remainder < 0:
+                return None
+            shorter_lengths = numpy.concatenate(([0], cumulative_lengths[:-1]))
+            index = numpy.searchsorted(shorter_lengths, remainder, side='right') - 1
+            return int(lengths[index])
+
+        encountered = 0
+        for length in reversed(self.sorted_lengths()):
+            encountered += length * self.length_counts[length]
+            if encountered >= target:
+                return length
+        return None
+
+    #Table of (x, Nx, Lx) for Comparing Assemblies
+    def Nx_curve(self, x_values=range(0, 101, 10)):
+        return zip(x_values, self.Nx_values(x_values), self.Lx_values(x_values))
+
+    def gc_percent(self):
+        if not (self.gc_count + self.at_count):
+            return None
+        return (float(self.gc_count) / (self.gc_count + self.at_count)) * 100
+
+    def formatted_total_length(self):
+        (formatted_number, prefix) = SI_prefix(self.total_length)
+        return str(formatted_number) + ' ' + prefix + 'bp'
+
+    #Values for Report Headers: Count, Len, Av.Len, SRange, ERange, Median, N50
+    def report_values(self):
+        return [str(x) for x in [self.count, self.formatted_total_length(), self.mean(), 
+                                 self.shortest[0], self.longest[0], self.median(), 
+                                 self.Nx(50)]]
+
+    def summary(self):
+        if not self.count:
+            return 'Results:\nNumber of Sequences: 0\n'
+        summary =  'Results:\n'
+        summary += 'Number of Sequences: %i\n' % self.count
+        summary += 'Total Sequence Length: %s\n' % self.formatted_total_length()
+        summary += 'Average Sequence Length: %i\n' % self.mean()
+        summary += 'Range: %i to %i\n' % (self.shortest[0], self.longest[0])
+        summary += 'Median Length: %i\n' % self.median()
+        summary += 'N50 Length: %i\n' % self.Nx(50)
+        summary += 'N90 Length: %i\n' % self.Nx(90)
+        summary += 'L50 Count: %i\n' % self.Lx(50)
+        if self.genome_size:
+            ng50 = self.NGx(50)
+            summary += 'NG50 Length: %s\n' % ('N/A' if ng50 is None else str(ng50))
+        summary += 'Shortest Sequence: %i bp, %s\n' % self.shortest
+        summary += 'Longest Sequence: %i bp, %s\n' % self.longest
+        if self.gc_percent() is not None:
+            summary += 'GC Content: %.2f%%\n' % self.gc_percent()
+        return summary
+
+    #Plain Representation for Storage in the Project Cache, Names are Decoded as
+    #Latin-1 so that Any Byte String Survives the Round Trip Through JSON
+    def to_dict(self):
+        extremes = {}
+        for extreme in ['shortest', 'longest']:
+            if getattr(self, extreme):
+                (length, name) = getattr(self, extreme)
+                extremes[extreme] = (length, name.decode('latin-1'))
+            else:
+                extremes[extreme] = None
+        return {'length_counts':sorted(self.length_counts.items()), 
+                'shortest':extremes['shortest'], 'longest':extremes['longest'], 
+                'gc_count':self.gc_count, 'at_count':self.at_count}
+
+    @classmethod
+    def from_dict(cls, stats_dict, genome_size=None):
+        stats = cls(genome_size)
+        for (length, count) in stats_dict['length_counts']:
+            stats.length_counts[length] = count
+            stats.count += count
+            stats.total_length += length * count
+        if stats_dict['shortest']:
+            for extreme in ['shortest', 'longest']:
+                (length, name) = stats_dict[extreme]
+                setattr(stats, extreme, (length, name.encode('latin-1')))
+        stats.gc_count = stats_dict['gc_count']
+        stats.at_count = stats_dict['at_count']
+        return stats
+
+    def details(self):
+        if not self.count:
+            return 'No Sequences Found.\n'
+        report =  'Shortest Sequence: %i bp,\t%s\n' % self.shortest 
+        report += 'Longest Sequence:  %i bp,\t%s\n' % self.longest
+        return report
+
+
+#Read Statistics for All Sequences in a FASTA File in a Single Pass, or from the Project
+#Cache if Current. Returns the Statistics Object and a List of Any Formatting Warnings.
+#Files with warnings are not cached, so the warnings are repeated on every read.
+def read_file_stats(file_name, genome_size=None, except_extra_lines=True):
+    cached_stats = get_result(file_name, 'sequence_stats')
+    if cached_stats is not None:
+        stats = SequenceStats.from_dict(cached_stats)
+        stats.genome_size = genome_size
+        return (stats, [])
+
+    stats = SequenceStats(genome_size)
+    file_object = open_sequence_file(file_name)
+    reader = FASTA_Reader(file_object, file_name, except_extra_lines=except_extra_lines)
+    try:
+        for (name, contents, line_number) in reader:
+            stats.add_sequence(name, contents)
+    finally:
+        file_object.close()
+
+    if not reader.warnings:
+        store_result(file_name, 'sequence_stats', stats.to_dict())
+    return (stats, reader.warnings)
 
 
 #Fasta Database Class
@@ -25,7 +825,7 @@ class FASTA_DB():
         self.out_file = None
         self.base_name = None
         self.sequence_type = None
-        self.sequences = OrderedDict()
+        self.sequences = SequenceStore()
         self.header = ''
 
     def reset_settings(self):
@@ -84,6 +884,45 @@ class FASTA_DB():
         else:
             start_sequence_count = len(self.sequences)
 
+        print 'Reading File: %s' % file_name
+        f = open_sequence_file(file_name)
+
+        reader = FASTA_Reader(f, file_name, except_extra_lines=self.except_extra_lines)
+        for (name, contents, sequence_line) in reader:
+            self.add_sequence(name, contents, sequence_line)
+
+        f.close()
+
+        if reader.header:
+            self.header += reader.header
+            print 'Sequence File Header:'
+            print reader.header.rstrip()
+
+        if not reader.sequence_count:
+            print 'Empty Sequence File.'
+            return 0
+
+        if reset:
+            self.in_file = file_name
+            self.set_base_name(file_name)
+
+        sequences_added = (len(self.sequences) - start_sequence_count)
+
+        print '%i Sequences Read from File %s' % (sequences_added, file_name)
+        return sequences_added
+
+    #Original Line-by-Line Parser, Retained for Benchmarking of read_file
+    def _OLD_read_file_lines(self, file_name, reset=True):
+        if not os.path.isfile(file_name):
+            print 'File %s Not Found, No Changes Made.' % file_name
+            return False
+
+        if reset:
+            self.reset_data()
+            start_sequence_count = 0
+        else:
+            start_sequence_count = len(self.sequences)
+
         print 'Reading File: %s' % file_name
         f = open(file_name, 'rb')
         
@@ -156,6 +995,21 @@ class FASTA_DB():
     def add_file(self, file_name):
         return read_file(self, file_name, reset=False)
 
+    #Open File in Lazy Mode, Where Sequences are Fetched from Disk on Access by Name
+    def read_indexed(self, file_name):
+        if not os.path.isfile(file_name):
+            print 'File %s Not Found, No Changes Made.' % file_name
+            return False
+
+        self.reset_data()
+        print 'Opening Indexed File: %s' % file_name
+        self.sequences = IndexedSequences(file_name)
+        self.in_file = file_name
+        self.set_base_name(file_name)
+
+        print '%i Sequences Indexed in File %s' % (len(self.sequences), file_name)
+        return len(self.sequences)
+
 
     def print_sequences(self, space=True):
         if self.header:
@@ -170,19 +1024,13 @@ class FASTA_DB():
                 print ''
 
     def get_details(self):
-        shortest = (10000000000, 'None')
-        longest = (0, 'None')
-        for name in self.sequences.keys():
-            sequence_length = len(self.sequences[name])
-            if sequence_length < shortest[0]:
-                shortest = (sequence_length, name)
-            if sequence_length > longest[0]:
-                longest = (sequence_length, name)
-
-        report =  'Shortest Sequence: %i bp,\t%s\n' % shortest 
-        report += 'Longest Sequence:  %i bp,\t%s\n' % longest
+        return self.get_stats().details()
 
-        return report
+    def get_stats(self, genome_size=None):
+        stats = SequenceStats(genome_size)
+        for name in self.sequences:
+            stats.add(name, self.sequences.length(name))
+        return stats
 
     def _OLD_Read_FromFASTQ(self, file_name, verify=True):
         if os.path.isfile(file_name):
@@ -219,7 +1067,7 @@ class FASTA_DB():
         return self.base_name
 
 
-    def write_file(self, file_name, overwrite=False):
+    def write_file(self, file_name, overwrite=False, line_width=FASTA_LINE_WIDTH):
         if os.path.exists(file_name) and not overwrite:
             message = 'Attempting to Write to File: %s, but it Already Exists!' % file_name
             if self.except_file_exists:
@@ -229,19 +1077,8 @@ class FASTA_DB():
                 return False
 
         print 'Writing Sequences to File: %s' % file_name
-        out_file = open(file_name, 'w')
-        if self.header:
-            for line in self.header.splitlines(False):
-                out_file.write(';' + line + '\n')
-
-        for sequence_name in self.sequences:
-            out_file.write('>'+sequence_name+'\n')
-            formatted_sequence = '\n'.join(re.findall(r'.{1,60}', 
-                                           self.sequences[sequence_name], 
-                                           re.DOTALL))
-            out_file.write(formatted_sequence+'\n')
-
-        out_file.close()
+        with FASTA_Writer(file_name, line_width=line_width, header=self.header) as writer:
+            writer.write_records(self.sequences.iteritems())
 
         self.out_file = file_name
         print len(self.sequences), 'Sequences Written to file %s.' % file_name
@@ -252,69 +1089,14 @@ class FASTA_DB():
         print ''
 
         print 'Counting Sequence Lengths'
-
-        sequence_length_counts = {} 
-        counted_sequences = 0
-        total_length = 0 
-
-        for name in self.sequences:
-            length = len(self.sequences[name])
-            total_length += length
-            counted_sequences += 1
-            if length in sequence_length_counts:
-                sequence_length_counts[length] += 1
-            else:
-                sequence_length_counts[length] = 1
-
-        if counted_sequences != len(self.sequences):
-            raise_except('PROBLEM!!! Counted_sequences != Num Sequences')
-
-        print 'Finding Average Length...'
-        average_length = total_length/counted_sequences
-        sequence_lengths = sequence_length_counts.keys()
-        sequence_lengths.sort()
-
-        (formatted_number, prefix) = SI_prefix(total_length)
-        formatted_total_length = str(formatted_number) + ' ' + prefix + 'bp'
-
-        print 'Finding Median...'
-        median_index = counted_sequences/2
-        encountered = 0
-        for length in sequence_lengths:
-            encountered += sequence_length_counts[length]
-            if encountered >= median_index:
-                median_length = length
-                break
-
-        print 'Finding N50...'
-        weighted_counts = {}
-        total_weighted_counts = 0
-
-        for length in sequence_lengths:
-            weighted_count =  length * sequence_length_counts[length]
-            weighted_counts[length] = weighted_count
-            total_weighted_counts += weighted_count
-
-        weighted_half = total_weighted_counts/2
-        encountered = 0
-        for length in sequence_lengths:
-            encountered += weighted_counts[length]
-            if encountered >= weighted_half:
-                n50_length = length
-                break
+        stats = self.get_stats()
+        if not stats.count:
+            print_except('PROBLEM!!! No Sequences to Find N50 Length Of.')
 
         print ''
-        results = 'Results:\n'
-        results += 'Number of Sequences: %i\n' % counted_sequences
-        results += 'Total Sequence Length: %s\n' % formatted_total_length 
-        results += 'Average Sequence Length: %i\n' % average_length
-        results += 'Range: %i to %i\n' % (sequence_lengths[0], sequence_lengths[-1])
-        results += 'Median Length: %i\n' % median_length
-        results += 'N50 Length: %i\n' % n50_length
+        results = stats.summary()
         results += 'Count, Len, Av.Len, SRange, ERange, Median, N50\n'
-        results += '%i, %s, %i, %i, %i, %i, %i\n' % (counted_sequences, formatted_total_length, 
-                                                     average_length, sequence_lengths[0], 
-                                                     sequence_lengths[-1], median_length, n50_length)
+        results += ', '.join(stats.report_values()) + '\n'
         print results
         return results   
    
@@ -367,9 +1149,8 @@ class FASTA_DB():
 
     def label_prefix(self, prefix, connector='_'):
         start_length = len(self.sequences)
-        for name in self.sequences.keys():
-            self.sequences[prefix+connector+name]=self.sequences[name]
-            del(self.sequences[name])
+        for name in self.sequences:
+            self.sequences.rename(name, prefix+connector+name)
 
         if start_length != len(self.sequences):
             print_except('PROBLEM: Num Labeled Sequences != Num Initial Sequences.')  
@@ -395,26 +1176,19 @@ class FASTA_DB():
                               
 
     def trim_names(self, length=1000):
-        new_sequences = OrderedDict()
-
         start_length = len(self.sequences)
         for name in self.sequences:           
             if len(name) >= length:
-                new_sequences[name[:length]] = self.sequences[name]
-            else:
-                new_sequences[name] = self.sequences[name]
-            del(self.sequences[name])
+                self.sequences.rename(name, name[:length])
 
-        if start_length != len(new_sequences):
+        if start_length != len(self.sequences):
             print_except('PROBLEM: Num Labeled Sequences != Num Initial Sequences.')  
 
-        self.sequences = new_sequences          
-
 
     # --Python Magic Methods--
     # Enable iteration over class instance
     def __iter__(self):
-        return self.sequences.keys().__iter__()
+        return iter(self.sequences)
 
     # Equality comparison, based on whether Annotation instances have same name.
     def __eq__(self, other):
@@ -471,136 +1245,41 @@ def check_N50(file_name):
     return True
 
 
-def check_N50_in_place(file_name, fail_exit=True, return_report=False, return_report_dict=False):
+def check_N50_in_place(file_name, fail_exit=True, return_report=False, return_report_dict=False,
+                       genome_size=None):
     analysis = ''
     if not os.path.isfile(file_name):
         print 'File %s Not Found, No Changes Made.' % file_name
         return analysis
 
-    sequence_length_counts = {} 
-    counted_sequences = 0
-
     print 'Reading File: %s' % file_name
-    f = open(file_name, 'r')
-    
-    f_enumerator = enumerate(f, start=1)        
-
-    (line_count, line) = f_enumerator.next()
-    while line.startswith(';'):
-        (line_count, line) = f_enumerator.next()
-
-    if not line or not line.startswith('>'):
+    try:
+        (stats, warnings) = read_file_stats(file_name, genome_size, 
+                                            except_extra_lines=fail_exit)
+    except Exception as error:
         if fail_exit:
-            print_exit('FASTA File %s Formatted Incorrectly, ' % file_name
-                         + 'Header Space Found at line %i.' % line_count)
-        else:
-            analysis += ('FASTA File %s Formatted Incorrectly, ' % file_name
-                         + 'Header Space Found at line %i.' % line_count)
-            return analysis
-        
-    (line_count, line) = f_enumerator.next()
-    if line.startswith('>'):
-        if fail_exit:
-            print_exit('FASTA File %s Formatted Incorrectly, First "Contents" ' % file_name
-                         + 'line at line %i is also a sequence header.' % line_count)
-        else:
-            analysis += ('FASTA File %s Formatted Incorrectly, First "Contents" ' % file_name
-                         + 'line at line %i is also a sequence header.' % line_count)
-            return analysis
-
-    content_length = len(line.strip())
-
-    for (line_count, line) in f_enumerator:
-        line = line.strip()
-        if not line:
-            if fail_exit:
-                print_exit('FASTA File %s Formatted Incorrectly, ' % file_name
-                             + 'Blank Line Found at Line %i.' % line_count)
-            else:
-                analysis += ('FASTA File %s Formatted Incorrectly, ' % file_name
-                             + 'Blank Line Found at Line %i.' % line_count)
-
-        if line.startswith('>'):
-            #Add Previous Sequence Length
-            if content_length in sequence_length_counts:
-                sequence_length_counts[content_length] += 1
-            else:
-                sequence_length_counts[content_length] = 1
-            counted_sequences += 1
-
-            #Start New Sequence 
-            content_length = 0
-
-        else:
-            content_length += len(line.strip())
-
-    #Add Last Sequence
-    if content_length in sequence_length_counts:
-        sequence_length_counts[content_length] += 1
-    else:
-        sequence_length_counts[content_length] = 1
-    counted_sequences += 1
-
-    f.close()
-
-    print '%i Sequence Lengths Read from File %s' % (counted_sequences, file_name)
-
-    print 'Finding Total and Average Length...'
-    total_length = 0 
-    for length in sequence_length_counts:
-        total_length += length * sequence_length_counts[length]
-
-    average_length = total_length/counted_sequences
-    sequence_lengths = sequence_length_counts.keys()
-    sequence_lengths.sort()
-
-    (formatted_number, prefix) = SI_prefix(total_length)
-    formatted_total_length = str(formatted_number) + ' ' + prefix + 'bp'
-
-    print 'Finding Median...'
-    median_index = counted_sequences/2
-    encountered = 0
-    for length in sequence_lengths:
-        encountered += sequence_length_counts[length]
-        if encountered >= median_index:
-            median_length = length
-            break
-
-
-    print 'Finding N50...'
-    weighted_counts = {}
-    total_weighted_counts = 0
+            print_exit(str(error))
+        analysis += str(error)
+        return analysis
 
-    for length in sequence_lengths:
-        weighted_count =  length * sequence_length_counts[length]
-        weighted_counts[length] = weighted_count
-        total_weighted_counts += weighted_count
+    for warning in warnings:
+        analysis += warning
 
-    weighted_half = total_weighted_counts/2
-    encountered = 0
-    for length in sequence_lengths:
-        encountered += weighted_counts[length]
-        if encountered >= weighted_half:
-            n50_length = length
-            break
+    if not stats.count:
+        message = 'FASTA File %s Contains No Sequences.' % file_name
+        if fail_exit:
+            print_exit(message)
+        analysis += message
+        return analysis
 
+    print '%i Sequence Lengths Read from File %s' % (stats.count, file_name)
     print ''
-    analysis += 'Results:\n'
-    analysis += 'Number of Sequences: %i\n' % counted_sequences
-    analysis += 'Total Sequence Length: %s\n' % formatted_total_length 
-    analysis += 'Average Sequence Length: %i\n' % average_length
-    analysis += 'Range: %i to %i\n' % (sequence_lengths[0], sequence_lengths[-1])
-    analysis += 'Median Length: %i\n' % median_length
-    analysis += 'N50 Length: %i\n' % n50_length
+    analysis += stats.summary()
     analysis += '\n'
     analysis += 'Tab-Separated Results:\n'
-    
 
     keys = ['Count', 'Len', 'Av.Len', 'SRange', 'ERange', 'Median', 'N50']
-    values = [str(x) for x in [counted_sequences, formatted_total_length, average_length, 
-                               sequence_lengths[0], sequence_lengths[-1], median_length, 
-                               n50_length]]
-
+    values = stats.report_values()
 
     report_dict = dict(zip(keys, values))
     report_dict['report_type'] = 'sequence'
@@ -619,32 +1298,249 @@ def check_N50_in_place(file_name, fail_exit=True, return_report=False, return_re
         return analysis
 
 
-def label_sequences(in_file_name, label, out_file_name=None):
+#Streaming Sequence Name Rewriting, Applied in Order:
+#    pattern/replacement: Regular Expression Substitution on the Name
+#    index_format:        Replace Name with Running Index (eg. "Contig%i")
+#    prefix/suffix:       Join Label Before/After Name with "connector"
+class SequenceRenamer():
+    def __init__(self, prefix='', suffix='', connector='_', pattern=None, replacement='',
+                 index_format=None, start_index=1):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.connector = connector
+        self.pattern = (re.compile(pattern) if pattern else None)
+        self.replacement = replacement
+        self.index_format = index_format
+        self.index = start_index
+
+    def rename(self, name):
+        if self.pattern:
+            name = self.pattern.sub(self.replacement, name)
+        if self.index_format:
+            name = self.index_format % self.index
+            self.index += 1
+        if self.prefix:
+            name = self.prefix + self.connector + name
+        if self.suffix:
+            name = name + self.connector + self.suffix
+        return name
+
+
+#Rename (name, sequence) Records from Input Iterable as They Pass Through.
+#Repeated input names are first given "RepeatN_" prefixes as in FASTA_DB.add_sequence,
+#and optional name_map_object receives "old_name<TAB>new_name" lines (see 
+#annotation.tabMapParse). Only names are retained, so memory does not grow with sequences.
+def rename_records(records, renamer, name_map_object=None, except_empty_contents=True):
+    input_names = set()
+    output_names = set()
+    for (name, contents) in records:
+        if name in input_names:
+            for header in ['Repeat' + str(x) + '_' for x in range(1,100)]:
+                new_name = header + name
+                if new_name not in input_names:
+                    break
+            print >> sys.stderr, ('ERROR: Repeated Sequence Header: '
+                                  '%s   Added as %s' % (name, new_name))
+            name = new_name
+        input_names.add(name)
+
+        if not contents:
+            if except_empty_contents:
+                print_except('ERROR: Sequence %s has no detectable contents' % name)
+            else:
+                print >> sys.stderr, 'ERROR: Sequence %s has no detectable contents' % name
+
+        new_name = renamer.rename(name)
+        if new_name in output_names:
+            print_except('ERROR: Renamed Sequence Header: %s is Not Unique.' % new_name)
+        output_names.add(new_name)
+        if name_map_object:
+            name_map_object.write(name + '\t' + new_name + '\n')
+        yield (new_name, contents)
+
+
+#Rename Sequences from Input to Output File in a Single Streaming Pass
+def relabel_file(in_file_name, out_file_name, renamer, name_map_file=None, 
+                 line_width=FASTA_LINE_WIDTH, overwrite=False):
+    if not os.path.isfile(in_file_name):
+        print 'File %s Does Not Exist.' % in_file_name
+        return False
+
+    if os.path.exists(out_file_name) and not overwrite:
+        print >> sys.stderr, ('ERROR: Attempting to Write to File: %s, ' % out_file_name
+                              + 'but it Already Exists!, No Changes Made.')
+        return False
+
+    print 'Reading File: %s' % in_file_name
+    print 'Writing Sequences to File: %s' % out_file_name
+    in_file = open_sequence_file(in_file_name)
+    name_map_object = (open(name_map_file, 'w') if name_map_file else None)
+    try:
+        reader = FASTA_Reader(in_file, in_file_name)
+        records = ((name, contents) for (name, contents, line_number) in reader)
+        first_record = next(records, None)
+        with FASTA_Writer(out_file_name, line_width=line_width, 
+                          header=reader.header) as writer:
+            if first_record:
+                renamed = rename_records(chain([first_record], records), renamer, 
+                                         name_map_object)
+                writer.write_records(renamed)
+    except:
+        #Do Not Leave Partial Output to be Mistaken for a Completed File
+        if os.path.isfile(out_file_name):
+            os.remove(out_file_name)
+        raise
+    finally:
+        in_file.close()
+        if name_map_object:
+            name_map_object.close()
+
+    if not writer.sequence_count:
+        print 'Empty Sequence File.'
+    print writer.sequence_count, 'Sequences Written to file %s.' % out_file_name
+    if name_map_file:
+        print 'Name Map Written to File: %s' % name_map_file
+    return True
+
+
+def label_sequences(in_file_name, label, out_file_name=None, suffix='', pattern=None, 
+                    replacement='', index_format=None, name_map_file=None, 
+                    line_width=FASTA_LINE_WIDTH):
     if not os.path.isfile(in_file_name):
         print 'File %s Does Not Exist.' % in_file_name
         return False
 
     print 'Adding Label: %s to Sequences in File: %s' % (label, in_file_name)
     print ''
-    database = FASTA_DB()
-    database.read_file(in_file_name)
-    print ''
-    database.label_prefix(label)
+    #Output is Written Uncompressed, so the Default Name Drops Any Compressed Suffix
     if not out_file_name:
-        out_file_name = in_file_name + '.labeled'
+        out_file_name = strip_compression_suffix(in_file_name) + '.labeled'
 
-    database.write_file(out_file_name)
+    renamer = SequenceRenamer(prefix=label, suffix=suffix, pattern=pattern, 
+                              replacement=replacement, index_format=index_format)
+    relabel_file(in_file_name, out_file_name, renamer, name_map_file=name_map_file, 
+                 line_width=line_width)
     return True
 
 
+#Concatenate FASTA Files into One Output in a Single Streaming Pass, Optionally Renaming
+#Sequences, while Accumulating Statistics of the Output. Statistics are saved to the project
+#cache for the output file, so a following analysis does not need to read it again.
+#Returns the Statistics Object.
+def combine_files(in_file_names, out_file_name, renamer=None, line_width=FASTA_LINE_WIDTH,
+                  genome_size=None):
+    for in_file_name in in_file_names:
+        if not os.path.isfile(in_file_name):
+            print_except('Input File: %s Not Found.' % in_file_name)
+
+    stats = SequenceStats(genome_size)
+    try:
+        with FASTA_Writer(out_file_name, line_width=line_width) as writer:
+            for in_file_name in in_file_names:
+                print 'Adding Sequences from File: %s' % in_file_name
+                sys.stdout.flush()
+                in_file = open_sequence_file(in_file_name)
+                try:
+                    reader = FASTA_Reader(in_file, in_file_name)
+                    records = ((name, contents) for (name, contents, line_number) in reader)
+                    if renamer:
+                        records = rename_records(records, renamer)
+                    for (name, contents) in records:
+                        stats.add_sequence(name, contents)
+                        writer.write(name, contents)
+                finally:
+                    in_file.close()
+    except:
+        if os.path.isfile(out_file_name):
+            os.remove(out_file_name)
+        raise
+
+    store_result(out_file_name, 'sequence_stats', stats.to_dict())
+    print stats.count, 'Sequences Written to file %s.' % out_file_name
+    return stats
+
+
 def details(in_file_name):
     if not os.path.isfile(in_file_name):
         print 'File %s Does Not Exist.' % in_file_name
         return False
 
     database = FASTA_DB()
-    database.read_file(in_file_name)
+    if detect_compression(in_file_name) not in [None, 'bgzf']:
+        database.read_file(in_file_name)
+    else:
+        database.read_indexed(in_file_name)
     print ''
     details = database.get_details()
     print details
     return True
+
+
+#Print Full Single-Pass Statistics for a FASTA File
+def statistics(in_file_name, genome_size=None):
+    if not os.path.isfile(in_file_name):
+        print 'File %s Does Not Exist.' % in_file_name
+        return False
+
+    print 'Reading File: %s' % in_file_name
+    (stats, warnings) = read_file_stats(in_file_name, genome_size)
+    print ''
+    summary = stats.summary()
+    if stats.count:
+        summary += '\nNx Curve:\nx\tNx\tLx\n'
+        for (x, nx_length, lx_count) in stats.Nx_curve():
+            summary += '%i\t%i\t%i\n' % (x, nx_length, lx_count)
+    print summary
+    return summary
+
+
+#Compare Throughput of Block-Based read_file with Original Line-Based Parser
+def benchmark_read_file(file_name):
+    if not os.path.isfile(file_name):
+        print 'File %s Does Not Exist.' % file_name
+        return False
+
+    file_size = os.path.getsize(file_name)
+    results = OrderedDict()
+    for (parser_name, method_name) in [('Line-Based', '_OLD_read_file_lines'),
+                                       ('Block-Based', 'read_file')]:
+        print 'Timing %s Parser...' % parser_name
+        database = FASTA_DB()
+        start_time = time.time()
+        getattr(database, method_name)(file_name)
+        elapsed_time = max(time.time() - start_time, 0.000001)
+
+        digest = hashlib.md5()
+        for name in database:
+            digest.update(name + '\n' + database[name] + '\n')
+        results[parser_name] = (elapsed_time, len(database), digest.hexdigest())
+        del(database)
+        print ''
+
+    (formatted_size, prefix) = SI_prefix(file_size)
+    report = 'Benchmark Results for File: %s (%i %sB)\n' % (file_name, formatted_size, prefix)
+    for parser_name in results:
+        (elapsed_time, sequence_count, digest) = results[parser_name]
+        report += '%s Parser: %.2f s, %.1f MB/s, %i Sequences\n' % (
+                  parser_name.ljust(11), elapsed_time, (file_size / 1000000.0) / elapsed_time,
+                  sequence_count)
+
+    (line_time, line_count, line_digest) = results['Line-Based']
+    (block_time, block_count, block_digest) = results['Block-Based']
+    report += 'Speedup: %.2fx\n' % (line_time / block_time)
+    report += 'Parsed Sequences Identical: %s\n' % str(line_digest == block_digest)
+    print report
+    return report
+
+
+#Fetch a Single Sequence by Name Using the File Index
+def fetch_sequence(file_name, name, start=0, end=None):
+    sequences = IndexedSequences(file_name)
+    contents = sequences.fetch(name, start, end)
+    sequences.close()
+    return contents
+
+#Return Ordered Dictionary of Sequence Lengths by Name Using the File Index
+def sequence_lengths(file_name):
+    index = load_FASTA_index(file_name)
+    return OrderedDict((name, index[name][0]) for name in index)
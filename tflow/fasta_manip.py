@@ -18,11 +18,14 @@ if __name__ == "__main__" and __package__ is None:
     import tflow
     __package__ = "tflow"
 
-from .fasta import check_FASTA, check_N50, check_N50_in_place, details
+from .fasta import check_FASTA, check_N50, check_N50_in_place, details, statistics, \
+                   benchmark_read_file
 
-PRINT_MODES = {'check':'check', 'N50':'N50', 'IP_N50':'IP_N50', 'details':'details'}
+PRINT_MODES = {'check':'check', 'N50':'N50', 'IP_N50':'IP_N50', 'details':'details',
+               'benchmark':'benchmark', 'stats':'stats'}
 FLEXIBLE_MODES = {'verify':'check', 'n50':'N50', 'ip_n50':'IP_N50', 'IP_n50':'IP_N50', 
-                  'ip_N50':'IP_N50', 'Details':'details'}
+                  'ip_N50':'IP_N50', 'Details':'details', 'Benchmark':'benchmark',
+                  'statistics':'stats', 'Stats':'stats'}
 ALL_MODES = PRINT_MODES.copy()
 ALL_MODES.update(FLEXIBLE_MODES)
 
@@ -39,6 +42,8 @@ def parse_count_sequences_args():
                         choices=PRINT_MODES.keys())
     parser.add_argument('sequence_file', action='store', 
                         help='Input Sequence File', metavar='SEQUENCE_FILE')
+    parser.add_argument('--genome_size', action='store', type=int, default=None,
+                        help='Expected Genome Size for NG50 ("stats" Mode)')
 
     return vars(parser.parse_args())
 
@@ -76,6 +81,18 @@ if __name__ == '__main__':
         print ''
         details(sequence_file)
 
+    elif mode == 'stats':
+        print ''
+        print '  --- Going to Find Sequence Statistics for Fasta File: %s ---' % sequence_file
+        print ''
+        statistics(sequence_file, options['genome_size'])
+
+    elif mode == 'benchmark':
+        print ''
+        print '  --- Going to Benchmark FASTA Parsing of File: %s ---' % sequence_file
+        print ''
+        benchmark_read_file(sequence_file)
+
     print ''
     print ' --- All Done! --- '
     print ''
@@ -0,0 +1,118 @@
+#TFLOW Component: Fingerprints of Step Settings and Input Files
+#
+#Dan Stribling
+#Florida State University
+#Center for Genomics and Personalized Medicine
+#Version 0.9, 04/20/2015
+#Project URL: http://www.github.com/fsugenomics/tflow
+
+import os
+import json
+import hashlib
+
+from .cache import file_fingerprint
+
+STEP_FINGERPRINT_SUFFIX = '.auto.fingerprint'
+RESULT_NAME_SETTINGS = ['result_name_file']
+#Settings that Change How a Step is Run or Reported, but Not its Results
+UNFINGERPRINTED_SETTINGS = ['mode', 'overwrite', 'confirm', 'verbose', 'print_test_output',
+                            'is_pipe', 'write_settings', 'write_times', 'write_pid',
+                            'write_analysis', 'write_command', 'parallel_steps', 'CPU_budget',
+                            'use_broker', 'broker_shrink', 'broker_shrink_memory',
+                            'broker_CPUs', 'broker_memory',
+                            'resource_file', 'resource_grant', 'max_CPU', 'max_memory',
+                            'use_cache', 'cache_hash', 'use_fingerprint',
+                            'concurrent_lanes']
+
+#A step's fingerprint is the SHA-1 of its own resolved settings together with the size,
+#modification time (and optionally content hash) of each of its input files. It is
+#written to "<job_type>.auto.fingerprint" when a step completes, and a completed step
+#is only considered done while the fingerprint of its current settings matches.
+
+def resolve_input_file(file_name, options):
+    if os.path.isabs(file_name):
+        return file_name
+    for directory in [options.get('project_directory', ''), options.get('working_directory', '')]:
+        full_file_name = os.path.join(directory or '', file_name)
+        if os.path.exists(full_file_name):
+            return os.path.abspath(full_file_name)
+    return file_name
+
+def read_file_names(list_file_name):
+    with open(list_file_name, 'r') as list_file:
+        return [line.strip() for line in list_file if line.strip()]
+
+#Return Input Files Named by "input_settings" (Files or Lists of Files) and Files Listed
+#Within the Files Named by "input_list_settings", Resolved Against Project Directories
+def step_input_files(options, input_settings=[], input_list_settings=[]):
+    input_files = []
+    for setting in input_settings:
+        if setting in options and options[setting]:
+            values = options[setting]
+            if not isinstance(values, list):
+                values = [values]
+            input_files += [resolve_input_file(str(value), options) for value in values]
+            if setting in RESULT_NAME_SETTINGS and os.path.isfile(input_files[-1]):
+                with open(input_files[-1], 'r') as result_name_file:
+                    input_files.append(resolve_input_file(result_name_file.read().strip(),
+                                                          options))
+
+    for setting in input_list_settings:
+        if setting in options and options[setting]:
+            list_file_name = resolve_input_file(str(options[setting]), options)
+            input_files.append(list_file_name)
+            if os.path.isfile(list_file_name):
+                input_files += [resolve_input_file(name, options)
+                                for name in read_file_names(list_file_name)]
+    return input_files
+
+#Fingerprint the Settings Named in "setting_names" (All Settings if None) and Input Files
+def step_fingerprint(options, input_files, hash_contents=False, setting_names=None):
+    if setting_names is None:
+        setting_names = options.keys()
+    settings = {}
+    for setting in set(setting_names):
+        if (setting in options and setting not in UNFINGERPRINTED_SETTINGS
+                and not isinstance(options[setting], dict)):
+            settings[setting] = str(options[setting])
+    inputs = {}
+    for input_file in input_files:
+        if os.path.isfile(input_file):
+            inputs[input_file] = file_fingerprint(input_file, hash_contents)
+        else:
+            inputs[input_file] = None
+
+    record = {'settings':settings, 'inputs':inputs}
+    encoded_record = json.dumps(record, sort_keys=True, ensure_ascii=True)
+    record['fingerprint'] = hashlib.sha1(encoded_record).hexdigest()
+    return record
+
+def read_step_fingerprint(file_name):
+    try:
+        with open(file_name, 'r') as fingerprint_file:
+            return json.load(fingerprint_file)
+    except (IOError, ValueError):
+        return None
+
+def write_step_fingerprint(file_name, record):
+    with open(file_name, 'w') as fingerprint_file:
+        json.dump(record, fingerprint_file, sort_keys=True, indent=1)
+
+#Return List of Descriptions of Differences Between Stored and Current Fingerprints
+def fingerprint_changes(stored_record, record):
+    if stored_record is None or 'fingerprint' not in stored_record:
+        return ['Stored Fingerprint Not Readable']
+    if stored_record['fingerprint'] == record['fingerprint']:
+        return []
+    changes = []
+    for (section, description) in [('settings', 'Setting'), ('inputs', 'Input File')]:
+        stored_items = stored_record.get(section, {})
+        items = record[section]
+        for key in sorted(set(stored_items) | set(items)):
+            if key not in items:
+                changes.append('%s Removed: %s' % (description, key))
+            elif key not in stored_items:
+                changes.append('%s Added: %s' % (description, key))
+            elif stored_items[key] != items[key]:
+                changes.append('%s Changed: %s' % (description, key))
+    return changes or ['Fingerprint Changed']
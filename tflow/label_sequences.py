@@ -1,6 +1,6 @@
 #!/usr/bin/env python2.7
 #TFLOW Utility: Add prefix label to sequence headers in a FASTA file.
-#Usage: "label_sequences.py input_file.fa prefix_label [output_file.fa]"
+#Usage: "label_sequences.py input_file.fa prefix_label [output_file.fa] [--options]"
 #For Full Usage: "label_sequences.py -h"
 #
 #Dan Stribling
@@ -10,6 +10,7 @@
 #Project URL: http://www.github.com/fsugenomics/tflow
 
 import argparse
+import os
 
 if __name__ == "__main__" and __package__ is None:
     import sys
@@ -17,8 +18,8 @@ if __name__ == "__main__" and __package__ is None:
     import tflow
     __package__ = "tflow"
 
-from .util import ensure_FASTA
-from .fasta import label_sequences
+from .util import ensure_FASTA_GZ
+from .fasta import label_sequences, FASTA_LINE_WIDTH
 
 def parse_label_sequences_args():
     parser = argparse.ArgumentParser(prog='label_sequences.py',
@@ -28,16 +29,35 @@ def parse_label_sequences_args():
     parser.add_argument('label', action='store', help='Sequence Prefix Label',  metavar='LABEL')
     parser.add_argument('output_file_name', action='store', default=None,
                         nargs='?', help='Ouput File Name', metavar='OUT_FILE_NAME')
+    parser.add_argument('--suffix', action='store', default='', 
+                        help='Sequence Suffix Label', metavar='SUFFIX')
+    parser.add_argument('--pattern', action='store', default=None, 
+                        help='Regular Expression to Replace in Sequence Names', 
+                        metavar='REGEX')
+    parser.add_argument('--replacement', action='store', default='', 
+                        help='Replacement for "--pattern" Matches', metavar='TEXT')
+    parser.add_argument('--index_format', action='store', default=None, 
+                        help='Rename Sequences by Running Index (eg. "Contig%%i")', 
+                        metavar='FORMAT')
+    parser.add_argument('--name_map', action='store', default=None, 
+                        help='Write Tab-Separated "Old<TAB>New" Name Map to File', 
+                        metavar='MAP_FILE')
+    parser.add_argument('--line_width', action='store', type=int, default=FASTA_LINE_WIDTH,
+                        help='Output Sequence Line Width, 0 for Unwrapped', metavar='WIDTH')
     return vars(parser.parse_args())
 
 
 if __name__ == '__main__':
     
     options = parse_label_sequences_args()
-    ensure_FASTA(options['input_file_name'])
+    ensure_FASTA_GZ(options['input_file_name'])
 
     print ''
-    label_sequences(options['input_file_name'], options['label'], options['output_file_name'])
+    label_sequences(options['input_file_name'], options['label'], options['output_file_name'],
+                    suffix=options['suffix'], pattern=options['pattern'], 
+                    replacement=options['replacement'], 
+                    index_format=options['index_format'], 
+                    name_map_file=options['name_map'], line_width=options['line_width'])
     print ''
     print 'Labeling Complete'
     print ''
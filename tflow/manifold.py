@@ -12,7 +12,10 @@
 import sys
 import os
 import argparse
+import multiprocessing
 from copy import deepcopy
+from collections import OrderedDict
+from time import sleep, time, strftime, localtime
 
 if __name__ == "__main__" and __package__ is None:
     sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../'))
@@ -21,15 +24,27 @@ if __name__ == "__main__" and __package__ is None:
 
 from .util import (get_file_settings, print_warning, print_except, print_multi, print_exit,
                    write_file, print_settings, write_settings, write_date_time, read_file, 
-                   process_exists, kill_process, lowercase, flexible_boolean_string, BOOL, 
-                   FLEXIBLE_BOOL, ACTION_NAMES, DEFAULT_SETTINGS)
+                   process_exists, kill_process, lowercase, flexible_boolean_string, 
+                   flexible_boolean, BOOL, FLEXIBLE_BOOL, ACTION_NAMES, DEFAULT_SETTINGS)
 from . import util
+from .cache import configure_cache, set_cache_file
+from .fingerprint import (step_input_files, step_fingerprint, fingerprint_changes, 
+                          read_step_fingerprint, write_step_fingerprint, 
+                          STEP_FINGERPRINT_SUFFIX)
+from .resources import request_segment_resources, release_resources
+from .dashboard import Dashboard, StepProgress, TIMING_SUFFIX, DASHBOARD_REFRESH_INTERVAL
 
 MODES = ['track', 'analyze', 'run', 'read', 'test', 'stop', 'clean', 'reset', 
-         'settings']
+         'settings', 'dashboard']
 NULL_OUT_FILES = ['N/A', 'n/a', 'NA', 'na', 'None', 'none', None, '']
 READ_TYPES = ['fq', 'fa']
 JOB_TYPES = []
+STEP_POLL_INTERVAL = 2
+BATCH_SETTINGS = ['projects', 'projects_manifest', 'concurrent_projects', 'batch_cache',
+                  'dashboard_refresh']
+BATCH_CACHE_FILE = 'TFLOW_Batch.auto.cache'
+BATCH_LOG_FILE = 'TFLOW_Batch.auto.out'
+BATCH_STATUS_FILE = 'TFLOW_Batch.auto.status'
 
 def parse_args():
     parser = argparse.ArgumentParser(prog='manifold.py', 
@@ -62,6 +77,66 @@ def parse_args():
                             help='Tissue-Type Label for Automated Labeling', metavar='LABEL')
     tflow_args.add_argument('--max_CPU', action='store', default=None, 
                             help='Maximum Number of CPU\'s to Use for Run.', metavar='#CPU')
+    tflow_args.add_argument('--parallel_steps', action='store', default=None, 
+                            type=flexible_boolean_string, 
+                            help='Run Independent Pipe Steps Concurrently', 
+                            choices=BOOL, metavar='BOOL')
+    tflow_args.add_argument('--CPU_budget', action='store', default=None, 
+                            help='Total CPU\'s for Concurrent Pipe Steps (Default: All)', 
+                            metavar='#CPU')
+    tflow_args.add_argument('--use_broker', action='store', default=None, 
+                            type=flexible_boolean_string, 
+                            help='Reserve Segment CPUs and Memory with Node Resource Broker', 
+                            choices=BOOL, metavar='BOOL')
+    tflow_args.add_argument('--broker_shrink', action='store', default=None, 
+                            type=flexible_boolean_string, 
+                            help='Reduce CPU Requests to Fit Instead of Waiting', 
+                            choices=BOOL, metavar='BOOL')
+    tflow_args.add_argument('--broker_shrink_memory', action='store', default=None, 
+                            type=flexible_boolean_string, 
+                            help='Also Reduce Memory Requests to Fit Instead of Waiting', 
+                            choices=BOOL, metavar='BOOL')
+    tflow_args.add_argument('--broker_CPUs', action='store', default=None, 
+                            help='CPUs Shared by Brokered Segments (Default: All)', 
+                            metavar='#CPU')
+    tflow_args.add_argument('--broker_memory', action='store', default=None, 
+                            help='Memory Shared by Brokered Segments, Ex: "64G" (Default: All)', 
+                            metavar='MEMORY')
+    tflow_args.add_argument('--resource_file', action='store', default=None, 
+                            help='Resource Broker Ledger File Shared by TFLOW Processes '
+                                 + '(Default: Per-User File in Temporary Directory)',
+                            metavar='FILE')
+    tflow_args.add_argument('--use_fingerprint', action='store', default=None, 
+                            type=flexible_boolean_string, 
+                            help='Re-Run Completed Steps if Settings or Input Files Change', 
+                            choices=BOOL, metavar='BOOL')
+    tflow_args.add_argument('--use_cache', action='store', default=None, 
+                            type=flexible_boolean_string, 
+                            help='Cache Sequence Counts and Statistics in Project Directory', 
+                            choices=BOOL, metavar='BOOL')
+    tflow_args.add_argument('--cache_hash', action='store', default=None, 
+                            type=flexible_boolean_string, 
+                            help='Also Check Cached Files by Content Hash', 
+                            choices=BOOL, metavar='BOOL')
+
+    batch_args = parser.add_argument_group('Batch Args', 
+                                           'Arguments for Conducting Multiple Projects')
+    batch_args.add_argument('--projects', action='store', nargs='*', default=None,
+                            help='Project Directories to Conduct in Batch', metavar='DIR')
+    batch_args.add_argument('--projects_manifest', action='store', default=None,
+                            help='File Listing Project Directories, One Per Line', 
+                            metavar='FILE')
+    batch_args.add_argument('--concurrent_projects', action='store', default=None,
+                            help='Number of Batch Projects Conducted at Once (Default: 1)', 
+                            metavar='#PROJECTS')
+    batch_args.add_argument('--batch_cache', action='store', default=None,
+                            help='Sequence Cache Shared by Batch Projects '
+                                 + '(Default: %s in Current Directory)' % BATCH_CACHE_FILE,
+                            metavar='FILE')
+    batch_args.add_argument('--dashboard_refresh', action='store', default=None,
+                            help='Seconds Between Dashboard Redraws Without Progress '
+                                 + '(Default: %i)' % DASHBOARD_REFRESH_INTERVAL,
+                            metavar='SECONDS')
 
     testing_args = parser.add_argument_group('Test Mode Args', 
                                               'Arguments for Test Mode')
@@ -90,6 +165,9 @@ def parse_args():
                                help='Indicator of left reads, for automated parsing when paired')
     trimming_args.add_argument('--right_read_indicator', action='store', default=None,
                                help='Indicator of right reads, for automated parsing when paired')
+    trimming_args.add_argument('--concurrent_lanes', action='store', default=None,
+                               help='Number of Lanes Trimmed at Once, Sharing max_CPU Threads',
+                               metavar='#LANES')
 
     assembly_args = parser.add_argument_group('Assembly Args', 
                                               'Arguments for Assembly of Reads/Sequences')
@@ -133,8 +211,9 @@ def parse_args():
     return (vars(parser.parse_args()))
 
 
-def get_settings():
-    args = parse_args()
+def get_settings(args=None):
+    if args is None:
+        args = parse_args()
     settings = get_file_settings()
     for arg_name in args:
         if args[arg_name] not in ['', None]:
@@ -160,6 +239,24 @@ def get_settings():
     return settings
 
 
+#Fingerprint of Step Settings and Input Files, Which Segments Name with "INPUT_SETTINGS" 
+#and "INPUT_LIST_SETTINGS", or Return Directly with an "input_files" Function
+def module_step_fingerprint(module, options):
+    if hasattr(module, 'input_files'):
+        input_files = module.input_files(options)
+    else:
+        input_files = step_input_files(options, getattr(module, 'INPUT_SETTINGS', []),
+                                       getattr(module, 'INPUT_LIST_SETTINGS', []))
+    #Only the Settings a Segment Declares are Fingerprinted, So Unrelated Options Do Not
+    #Invalidate Completed Steps
+    setting_names = (list(getattr(module, 'DEFAULT_SETTINGS', {}))
+                     + getattr(module, 'REQUIRED_SETTINGS', [])
+                     + getattr(module, 'INPUT_SETTINGS', [])
+                     + getattr(module, 'INPUT_LIST_SETTINGS', [])
+                     + getattr(module, 'FINGERPRINT_SETTINGS', []))
+    return step_fingerprint(options, input_files,
+                            flexible_boolean(options.get('cache_hash', False)), setting_names)
+
 def flow(options, check_done=False):
     job_type = options['job_type']
     segments_module = __import__('tflow.segments', fromlist=[job_type])
@@ -216,17 +313,44 @@ def flow(options, check_done=False):
             print_except('Job Type %s Has No check_done Method.' % job_type)
 
         try:
-            return module.check_done(job_options)
+            step_done = module.check_done(job_options)
 
         except KeyboardInterrupt:
             (sys.stdout, sys.stderr) = terminal_output
             print_exit('')
 
+        #When Running, Completed Steps are Only Done if Settings and Inputs are Unchanged.
+        #Steps Completed Without a Fingerprint File are Considered Done as Before.
+        if (step_done and options['mode'] == 'run' 
+            and flexible_boolean(job_options.get('use_fingerprint', True))):
+            fingerprint_file_name = os.path.join(options['working_directory'], 
+                                                 job_type + STEP_FINGERPRINT_SUFFIX)
+            if os.path.isfile(fingerprint_file_name):
+                changes = fingerprint_changes(read_step_fingerprint(fingerprint_file_name),
+                                              module_step_fingerprint(module, job_options))
+                if changes:
+                    print_multi('%s Job Complete, but Settings or Inputs Have Changed:' % job_type,
+                                *['    ' + change for change in changes])
+                    print ''
+                    step_done = False
+        return step_done
+
     elif options['mode'] == 'run':
         print_multi('', 'Running %s Job...' % job_type, '')
         if not hasattr(module, 'run'):
             print_except('Job Type %s Has No Run Method.' % job_type)
 
+        if flexible_boolean(job_options.get('use_fingerprint', True)):
+            fingerprint_file_name = os.path.join(options['working_directory'], 
+                                                 job_type + STEP_FINGERPRINT_SUFFIX)
+            fingerprint = module_step_fingerprint(module, job_options)
+            if os.path.isfile(fingerprint_file_name):
+                os.remove(fingerprint_file_name)
+        else:
+            fingerprint = None
+
+        #Reserve CPUs and Memory on Node, Settings Record the Amounts Granted
+        grant = request_segment_resources(job_options)
         try:
             if options['write_settings']:
                 settings_file_name = os.path.join(options['working_directory'], 
@@ -243,10 +367,16 @@ def flow(options, check_done=False):
             if options['write_times']:
                 write_date_time(time_file, start=start_time)
 
+            if fingerprint:
+                write_step_fingerprint(fingerprint_file_name, fingerprint)
+
         except KeyboardInterrupt:
             (sys.stdout, sys.stderr) = terminal_output
             print_exit(['', 'Running Stopped.'], 2)
 
+        finally:
+            release_resources(grant)
+
     elif options['mode'] == 'track':
         print_multi('', 'Tracking %s Job...' % job_type, '')
         if not hasattr(module, 'track'):
@@ -375,6 +505,186 @@ def segment(options):
  
     print ''
 
+#Build Segment Settings for a Pipe Step from Pipe Settings and Pipe Step Settings
+def step_options(options, step, pipe_step_options):
+    step_run_options = deepcopy(options)
+
+    #Remove Step Settings from Segment Settings
+    for item in step_run_options.keys():
+        if isinstance(step_run_options[item], dict):
+            del(step_run_options[item])
+
+    #Add Task-Specific Options From Options File to Segment Settings
+    if step in options:
+        step_dict = options[step]
+        for setting in step_dict:
+            if (setting in step_run_options 
+                and step_dict[setting] != step_run_options[setting]):
+                print_warning('Option  "%s" ' % setting
+                              + ' for step  "%s" ' % step
+                              + ' value "%s"' % str(step_run_options[setting])
+                              + ' is being overwritten by step-specific options file'
+                              + ' value:  "%s"' % step_run_options[setting])
+            step_run_options[setting] = step_dict[setting]
+
+
+    #Add Pipe-Specific Step Settings to Segment Settings
+    for setting in pipe_step_options:
+        #If pipe-specific option already given, print warning and override.
+        if (setting in step_run_options 
+            and pipe_step_options[setting] != step_run_options[setting]):
+            print_warning('Option  "%s" ' % setting
+                          + ' with Value:  "%s" ' % step_run_options[setting]
+                          + ' is Being Overridden for Pipe Step  "%s" ' % step
+                          + ' by Pipe Setting Value:  "%s" ' % pipe_step_options[setting])
+        step_run_options[setting] = pipe_step_options[setting]
+
+    #Set Absolute Working Directory
+    if 'working_directory' in pipe_step_options:
+        full_working_directory = os.path.join(options['project_directory'], 
+                                              pipe_step_options['working_directory']) 
+        step_run_options['working_directory'] = full_working_directory 
+
+    else:
+       step_run_options['working_directory'] = options['project_directory'] 
+
+    step_run_options['job_type'] = step
+    return step_run_options
+
+
+#Check Completion of Pipe Step and Perform Action for Mode
+def perform_step(options, step, step_run_options):
+    #If Necessary, Check if Step is Already Completed
+    if options['mode'] in ['test', 'read', 'stop', 'clean', 'reset']:
+        step_done = None
+    else:
+        step_done = flow(step_run_options, check_done=True)
+
+    #Perform Action on Step
+    if options['mode'] == 'run':
+        if step_done and not options['overwrite']:
+            print 'Running %s Job.\n\n    %s Job Already Complete.' % (step, step)
+        else:
+            flow(step_run_options)
+            print '    %s Job Complete.' % step
+
+    elif options['mode'] == 'track':
+        if not step_done:
+            flow(step_run_options)
+        else:
+            print'Tracking %s Job.\n' % step
+        print '    %s Job Complete.' % step
+
+    elif options['mode'] == 'analyze':
+        if not step_done:
+            print ('Analyzing %s Job.\n\n%s Job ' % (step, step)
+                   + 'Not Yet Complete, Cannot Analyze.')
+        else:
+            flow(step_run_options)
+            print '%s Analysis Complete.' % step
+
+    elif options['mode'] in ['test', 'read', 'stop', 'clean', 'reset']:
+        flow(step_run_options)
+ 
+    else:
+        print_except('Conductor Has Unrecognized Mode Type %s' % options['mode'])
+
+    print ''
+    sys.stdout.flush()
+
+
+#Return Ordered Dictionary of Step: [Required Steps] for Pipe Module. Pipes may define
+#"step_dependencies", a dictionary giving the steps each step requires, which must come
+#earlier in "steps". Steps not listed there require all earlier steps, as in a serial run.
+def pipe_step_dependencies(module, pipe_steps):
+    declared_dependencies = getattr(module, 'step_dependencies', {})
+    dependencies = OrderedDict()
+    previous_steps = []
+    for step in pipe_steps:
+        if step in declared_dependencies:
+            dependencies[step] = list(declared_dependencies[step])
+            for dependency in dependencies[step]:
+                if dependency not in previous_steps:
+                    print_except('Dependency: %s of Step: %s ' % (dependency, step)
+                                 + 'Must Be an Earlier Step in the Pipe.')
+        else:
+            dependencies[step] = list(previous_steps)
+        previous_steps.append(step)
+    return dependencies
+
+#Number of CPUs a Step Will Use, from its Settings or Segment Defaults, Otherwise 1
+def step_CPU_cost(step, step_run_options):
+    if 'max_CPU' in step_run_options and step_run_options['max_CPU']:
+        return max(int(step_run_options['max_CPU']), 1)
+    segments_module = __import__('tflow.segments', fromlist=[step])
+    module = getattr(segments_module, step)
+    if hasattr(module, 'DEFAULT_SETTINGS') and 'max_CPU' in module.DEFAULT_SETTINGS:
+        return max(int(module.DEFAULT_SETTINGS['max_CPU']), 1)
+    return 1
+
+def pipe_CPU_budget(options):
+    if 'CPU_budget' in options and options['CPU_budget']:
+        return int(options['CPU_budget'])
+    return multiprocessing.cpu_count()
+
+#Run Pipe Steps in Separate Processes as Soon as Their Required Steps Have Completed,
+#While the Total CPUs of Running Steps Fit in the CPU Budget. A step needing more than the
+#whole budget is started only when no other step is running. Steps requiring a failed
+#step are not started.
+def schedule_steps(options, pipe_steps, step_dependencies):
+    CPU_budget = pipe_CPU_budget(options)
+    print 'Scheduling Steps with CPU Budget: %i' % CPU_budget
+    print ''
+    waiting = list(pipe_steps)
+    running = OrderedDict()
+    finished = []
+    failed = []
+    while waiting or running:
+        for step in list(waiting):
+            if any(dependency in failed for dependency in step_dependencies[step]):
+                print_warning('Step: %s Not Run, as a Required Step Failed.' % step)
+                waiting.remove(step)
+                failed.append(step)
+
+        CPUs_used = sum(cost for (process, cost) in running.values())
+        for step in list(waiting):
+            if not all(dependency in finished for dependency in step_dependencies[step]):
+                continue
+            step_run_options = step_options(options, step, pipe_steps[step])
+            cost = step_CPU_cost(step, step_run_options)
+            if running and CPUs_used + cost > CPU_budget:
+                continue
+            sys.stdout.flush()
+            sys.stderr.flush()
+            process = multiprocessing.Process(target=perform_step, name=step,
+                                              args=(options, step, step_run_options))
+            process.start()
+            running[step] = (process, cost)
+            CPUs_used += cost
+            waiting.remove(step)
+            print 'Started Step: %s  (PID: %i, CPUs: %i)' % (step, process.pid, cost)
+            print ''
+            sys.stdout.flush()
+
+        if not running:
+            continue
+        sleep(STEP_POLL_INTERVAL)
+        for step in running.keys():
+            (process, cost) = running[step]
+            if process.is_alive():
+                continue
+            process.join()
+            del running[step]
+            if process.exitcode == 0:
+                finished.append(step)
+            else:
+                print_warning('Step: %s Failed with Exit Code: %s' % (step, process.exitcode))
+                failed.append(step)
+        sys.stdout.flush()
+
+    if failed:
+        print_exit('Pipe Steps Not Completed: %s' % ', '.join(failed))
+
 
 def manifold(options):
     #Get Segment Pipe Module Object
@@ -450,106 +760,273 @@ def manifold(options):
         print ''
         print ''
 
-    #Perform Each Step
-    for step in pipe_steps:
-        step_run_options = deepcopy(options)
-        pipe_step_options = pipe_steps[step]
-
-        #Remove Step Settings from Segment Settings
-        for item in step_run_options.keys():
-            if isinstance(step_run_options[item], dict):
-                del(step_run_options[item])
-
-        #Add Task-Specific Options From Options File to Segment Settings
-        if step in options:
-            step_dict = options[step]
-            for setting in step_dict:
-                if (setting in step_run_options 
-                    and step_dict[setting] != step_run_options[setting]):
-                    print_warning('Option  "%s" ' % setting
-                                  + ' for step  "%s" ' % step
-                                  + ' value "%s"' % str(step_run_options[setting])
-                                  + ' is being overwritten by step-specific options file'
-                                  + ' value:  "%s"' % step_run_options[setting])
-                step_run_options[setting] = step_dict[setting]
-
-
-        #Add Pipe-Specific Step Settings to Segment Settings
-        for setting in pipe_step_options:
-            #If pipe-specific option already given, print warning and override.
-            if (setting in step_run_options 
-                and pipe_step_options[setting] != step_run_options[setting]):
-                print_warning('Option  "%s" ' % setting
-                              + ' with Value:  "%s" ' % step_run_options[setting]
-                              + ' is Being Overridden for Pipe Step  "%s" ' % step
-                              + ' by Pipe Setting Value:  "%s" ' % pipe_step_options[setting])
-            step_run_options[setting] = pipe_step_options[setting]
+    #Perform Each Step, Concurrently as Dependencies and CPU Budget Allow if Running
+    step_dependencies = pipe_step_dependencies(module, pipe_steps)
+    if (options['mode'] == 'run' and hasattr(module, 'step_dependencies')
+        and flexible_boolean(options['parallel_steps'])):
+        schedule_steps(options, pipe_steps, step_dependencies)
+    else:
+        for step in pipe_steps:
+            perform_step(options, step, step_options(options, step, pipe_steps[step]))
 
-        #Set Absolute Working Directory
-        if 'working_directory' in pipe_step_options:
-            full_working_directory = os.path.join(options['project_directory'], 
-                                                  pipe_step_options['working_directory']) 
-            step_run_options['working_directory'] = full_working_directory 
+    #If Running, Write End Time of Pipe and Delete PID
+    if options['mode'] == 'run':
+        if options['write_times']:
+            write_date_time(pipe_time_file, start=pipe_start_time)
 
-        else:
-           step_run_options['working_directory'] = options['project_directory'] 
+        if options['write_pid']:
+            util.delete_pid_file(pipe_pid_file)
 
-        step_run_options['job_type'] = step
 
-        #If Necessary, Check if Step is Already Completed
-        if options['mode'] in ['test', 'read', 'stop', 'clean', 'reset']:
-            step_done = None
-        else:
-            step_done = flow(step_run_options, check_done=True)
+#Conduct Job Given by Options as Pipe or Single Segment
+def conduct(options):
+    if any(x in options['job_type'] for x in ['_pipe', '_Pipe']):
+        options['is_pipe'] = True
+        manifold(options)
+    else:
+        segment(options)
 
-        #Perform Action on Step
-        if options['mode'] == 'run':
-            if step_done and not options['overwrite']:
-                print 'Running %s Job.\n\n    %s Job Already Complete.' % (step, step)
-            else:
-                flow(step_run_options)
-                print '    %s Job Complete.' % step
 
-        elif options['mode'] == 'track':
-            if not step_done:
-                flow(step_run_options)
-            else:
-                print'Tracking %s Job.\n' % step
-            print '    %s Job Complete.' % step
+# --- Batch Conducting of Multiple Projects ---
+#Return Absolute Project Directories Given Directly and in Manifest File, in Order Given.
+#Manifest lines are directories relative to the manifest, blank lines and "#" are skipped.
+def batch_projects(args):
+    projects = [os.path.abspath(project) for project in (args['projects'] or [])]
+    if args['projects_manifest']:
+        if not os.path.isfile(args['projects_manifest']):
+            print_exit('Projects Manifest: %s Not Found.' % args['projects_manifest'])
+        manifest_directory = os.path.dirname(os.path.abspath(args['projects_manifest']))
+        for line in open(args['projects_manifest'], 'r'):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                projects.append(os.path.abspath(os.path.join(manifest_directory, line)))
+
+    for project in projects:
+        if not os.path.isdir(project):
+            print_exit('Project Directory: %s Not Found.' % project)
+    if len(set(projects)) != len(projects):
+        print_exit('Project Directories Given More Than Once.')
+    return projects
+
+#Conduct One Batch Project in its Own Directory, with Output to the Project Batch Log. 
+#Command-Line Arguments Override Each Project's Own Options Files.
+def batch_project(args, project_directory, batch_cache):
+    os.chdir(project_directory)
+    log_file = open(BATCH_LOG_FILE, 'w', 0)
+    sys.stdout = log_file
+    sys.stderr = log_file
+
+    options = get_settings(deepcopy(args))
+    options['project_directory'] = project_directory
+    if batch_cache and flexible_boolean(options['use_cache']):
+        set_cache_file(batch_cache, hash_contents=flexible_boolean(options['cache_hash']))
+    else:
+        configure_cache(options)
 
-        elif options['mode'] == 'analyze':
-            if not step_done:
-                print ('Analyzing %s Job.\n\n%s Job ' % (step, step)
-                       + 'Not Yet Complete, Cannot Analyze.')
-            else:
-                flow(step_run_options)
-                print '%s Analysis Complete.' % step
+    print ''
+    if options['mode'] == 'settings':
+        print_settings(options, 'TFLOW Manifold Options:')
+        print ''
+        return
+    conduct(options)
+    print 'All Jobs Complete.'
+    print ''
 
-        elif options['mode'] in ['test', 'read', 'stop', 'clean', 'reset']:
-            flow(step_run_options)
- 
-        else:
-            print_except('Conductor Has Unrecognized Mode Type %s' % options['mode'])
+#Print Settings of Each Batch Project as Read in its Own Directory
+def batch_settings(args, projects):
+    original_directory = os.getcwd()
+    for project_directory in projects:
+        os.chdir(project_directory)
+        try:
+            options = get_settings(deepcopy(args))
+        finally:
+            os.chdir(original_directory)
+        options['project_directory'] = project_directory
+        print 'Project: %s' % project_directory
+        print_settings(options, 'TFLOW Manifold Options:')
+        print ''
 
+def format_elapsed(seconds):
+    (minutes, seconds) = divmod(int(seconds), 60)
+    (hours, minutes) = divmod(minutes, 60)
+    return '%i:%02i:%02i' % (hours, minutes, seconds)
+
+def batch_status_table(projects, statuses):
+    header = ['Project', 'Status', 'Start', 'End', 'Elapsed']
+    rows = []
+    for project in projects:
+        status = statuses[project]
+        rows.append([project, status['status'], 
+                     strftime('%Y-%m-%d %H:%M:%S', localtime(status['start'])) 
+                     if status['start'] else '-', 
+                     strftime('%Y-%m-%d %H:%M:%S', localtime(status['end'])) 
+                     if status['end'] else '-',
+                     format_elapsed(status['end'] - status['start']) 
+                     if status['end'] else '-'])
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    lines = ['  '.join(item.ljust(width) for (item, width) in zip(row, widths)).rstrip()
+             for row in [header] + rows]
+    return '\n'.join(lines) + '\n'
+
+#Conduct Each Project in a Separate Process, Up to "concurrent_projects" at a Time. 
+#Projects share the node resource broker ledger and a single sequence cache, and a 
+#combined status and timing table is printed and written when all have finished.
+def batch(args):
+    projects = batch_projects(args)
+    if not projects:
+        print_exit('No Batch Projects Given.')
+    concurrent_projects = max(int(args['concurrent_projects'] or 1), 1)
+    batch_cache = os.path.abspath(args['batch_cache'] or BATCH_CACHE_FILE)
+    for setting in BATCH_SETTINGS:
+        del args[setting]
+
+    if args['mode'] == 'settings':
         print ''
-        sys.stdout.flush()
+        batch_settings(args, projects)
+        return
 
-    #If Running, Write End Time of Pipe and Delete PID
-    if options['mode'] == 'run':
-        if options['write_times']:
-            write_date_time(pipe_time_file, start=pipe_start_time)
+    print ''
+    print 'Conducting %i Projects, %i at a Time.' % (len(projects), concurrent_projects)
+    print ''
+    waiting = list(projects)
+    running = OrderedDict()
+    statuses = dict((project, {'status':'Not Run', 'start':None, 'end':None}) 
+                    for project in projects)
+    try:
+        while waiting or running:
+            while waiting and len(running) < concurrent_projects:
+                project = waiting.pop(0)
+                sys.stdout.flush()
+                process = multiprocessing.Process(target=batch_project, name=project,
+                                                  args=(args, project, batch_cache))
+                process.start()
+                running[project] = process
+                statuses[project].update({'status':'Running', 'start':time()})
+                print 'Started Project: %s  (PID: %i)' % (project, process.pid)
+                sys.stdout.flush()
+
+            sleep(STEP_POLL_INTERVAL)
+            for project in running.keys():
+                process = running[project]
+                if process.is_alive():
+                    continue
+                process.join()
+                del running[project]
+                statuses[project]['end'] = time()
+                if process.exitcode == 0:
+                    statuses[project]['status'] = 'Complete'
+                else:
+                    statuses[project]['status'] = 'Failed (%s)' % process.exitcode
+                print 'Finished Project: %s  %s' % (project, statuses[project]['status'])
+                sys.stdout.flush()
 
-        if options['write_pid']:
-            util.delete_pid_file(pipe_pid_file)
+    except KeyboardInterrupt:
+        for project in running:
+            running[project].terminate()
+            statuses[project].update({'status':'Stopped', 'end':time()})
+
+    status_table = batch_status_table(projects, statuses)
+    print ''
+    print status_table
+    write_file(BATCH_STATUS_FILE, status_table)
+    if any(statuses[project]['status'] != 'Complete' for project in projects):
+        print_exit('Batch Projects Not Completed, See %s in Each Project.' % BATCH_LOG_FILE)
+
+
+# --- Dashboard Tracking of All Steps of One or Many Projects ---
+#Return Output File for Segment Settings, or None if the Segment Has No Output File
+def step_out_file(step, step_run_options):
+    segments_module = __import__('tflow.segments', fromlist=[step])
+    module = getattr(segments_module, step)
+    out_file = step_run_options.get('out_file', getattr(module, 'OUT_FILE', None))
+    if not hasattr(module, 'Parser') or os.path.basename(str(out_file)) in NULL_OUT_FILES:
+        return None
+    return os.path.join(step_run_options['working_directory'], out_file)
+
+#Return StepProgress for Each Segment of the Job in a Project Directory, or of Each 
+#Step if the Job is a Pipe. Settings are read as when conducting in that directory.
+def project_step_progress(args, project_directory, project_name):
+    original_directory = os.getcwd()
+    os.chdir(project_directory)
+    try:
+        options = get_settings(deepcopy(args))
+    finally:
+        os.chdir(original_directory)
+    options['project_directory'] = project_directory
+
+    if any(x in options['job_type'] for x in ['_pipe', '_Pipe']):
+        pipes_module = __import__('tflow.pipes', fromlist=[options['job_type']])
+        pipe_steps = getattr(pipes_module, options['job_type']).steps
+    else:
+        pipe_steps = {options['job_type']:{}}
+        if 'working_directory' in options:
+            pipe_steps[options['job_type']]['working_directory'] = options['working_directory']
+
+    steps = []
+    for step in pipe_steps:
+        step_run_options = step_options(options, step, pipe_steps[step])
+        out_file = step_out_file(step, step_run_options)
+        if not out_file:
+            continue
+        segments_module = __import__('tflow.segments', fromlist=[step])
+        parser = getattr(segments_module, step).Parser()
+        parser.out_file = out_file
+        parser.sleep_time = STEP_POLL_INTERVAL
+        timing_file_name = os.path.join(step_run_options['working_directory'],
+                                        step + TIMING_SUFFIX)
+        steps.append(StepProgress(project_name, step, parser, timing_file_name))
+    return steps
+
+#Track Every Step of the Current Project, or of Each Batch Project, in One Dashboard
+def dashboard(args):
+    if args['projects'] or args['projects_manifest']:
+        projects = batch_projects(args)
+    else:
+        projects = [os.getcwd()]
+    refresh_interval = float(args['dashboard_refresh'] or DASHBOARD_REFRESH_INTERVAL)
+    for setting in BATCH_SETTINGS:
+        del args[setting]
+
+    steps = []
+    for project in projects:
+        project_name = os.path.relpath(project)
+        if len(project_name) > len(project):
+            project_name = project
+        steps += project_step_progress(args, project, project_name)
+    if not steps:
+        print_exit('No Steps With Output Files to Track.')
+
+    try:
+        all_complete = Dashboard(steps, refresh_interval, STEP_POLL_INTERVAL).run()
+    except KeyboardInterrupt:
+        print_exit(['', 'Tracking Stopped.'], 2)
+    if not all_complete:
+        print_exit('Steps Failed, See Output Files of Failed Steps.')
 
 
 if __name__ ==  '__main__':
 
-    options = get_settings()    
+    args = parse_args()
+    if args['mode'] == 'dashboard':
+        dashboard(args)
+        print 'All Jobs Complete.'
+        print ''
+        sys.exit(0)
+
+    if args['projects'] or args['projects_manifest']:
+        batch(args)
+        if args['mode'] != 'settings':
+            print 'All Projects Complete.'
+            print ''
+        sys.exit(0)
+
+    options = get_settings(args)    
 
     if 'project_directory' not in options:
         options['project_directory'] = os.getcwd()
 
+    configure_cache(options)
+
     print ''
 
     if options['mode'] == 'settings':
@@ -557,11 +1034,7 @@ if __name__ ==  '__main__':
         print ''
         sys.exit(0)
 
-    if any(x in options['job_type'] for x in ['_pipe', '_Pipe']):
-        options['is_pipe'] = True
-        manifold(options)
-    else:
-        segment(options)
+    conduct(options)
 
     print 'All Jobs Complete.'
     print ''
@@ -27,3 +27,10 @@ steps['BUSCO_Analysis'] = {'working_directory':'BUSCO_Analysis',
                            'copy_input_file':True,
                            }
 steps['Summary'] = {}
+
+#Steps Required Before Each Step, Allowing Independent Steps to Run Concurrently
+step_dependencies = {'Stat_Analysis':[],
+                     'CEGMA_Analysis':[],
+                     'BUSCO_Analysis':[],
+                     'Summary':['Stat_Analysis', 'CEGMA_Analysis', 'BUSCO_Analysis'],
+                     }
@@ -32,3 +32,10 @@ steps['BUSCO_Analysis'] = {'working_directory':'BUSCO_Analysis',
                            }
 
 steps['Summary'] = {}
+
+#Steps Required Before Each Step, Allowing Independent Steps to Run Concurrently
+step_dependencies = {'Package':['CAP3'],
+                     'CEGMA_Analysis':['CAP3'],
+                     'BUSCO_Analysis':['CAP3'],
+                     'Summary':['Package', 'CEGMA_Analysis', 'BUSCO_Analysis'],
+                     }
@@ -63,3 +63,13 @@ steps['BUSCO_Analysis'] = {'rel_input_analysis_file':(os.path.join(CAP3_DIR,
                            }
 
 steps['Summary'] = {}
+
+#Steps Required Before Each Step, Allowing Independent Steps to Run Concurrently
+step_dependencies = {'Trimmomatic':['Make_Read_Lists'],
+                     'Trinity':['Trimmomatic'],
+                     'CAP3':['Trinity'],
+                     'Package':['CAP3'],
+                     'CEGMA_Analysis':['CAP3'],
+                     'BUSCO_Analysis':['CAP3'],
+                     'Summary':['Package', 'CEGMA_Analysis', 'BUSCO_Analysis'],
+                     }
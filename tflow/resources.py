@@ -0,0 +1,223 @@
+#TFLOW Component: Node Resource Broker for CPUs and Memory Shared by Concurrent Segments
+#
+#Dan Stribling
+#Florida State University
+#Center for Genomics and Personalized Medicine
+#Version 0.9, 04/20/2015
+#Project URL: http://www.github.com/fsugenomics/tflow
+
+import os
+import re
+import json
+import tempfile
+import multiprocessing
+from time import sleep
+
+from .util import print_warning, print_except, process_exists
+from .cache import FileLock, umask_file_mode
+
+RESOURCE_FILE_NAME = os.path.join(tempfile.gettempdir(), 
+                                  'TFLOW.%i.auto.resources' % os.getuid())
+RESOURCE_FILE_VARIABLE = 'TFLOW_RESOURCE_FILE'
+RESOURCE_POLL_INTERVAL = 5
+MIN_CPU = 1
+MIN_MEMORY_GB = 1
+MEMORY_UNITS = {'':1.0, 'K':1.0/1048576, 'M':1.0/1024, 'G':1.0, 'T':1024.0}
+
+#Grants of All TFLOW Segments on the Node are Kept in a Single Ledger File:
+#    {"grants":{grant_id:{"pid":..., "CPU":..., "memory_GB":..., "job_type":...,
+#                         "project_directory":...}}}
+#Every read-modify-write of the ledger is done while holding an exclusive fcntl lock
+#on "<ledger>.lock", so segments from separate projects and processes never
+#oversubscribe the node. Grants held by processes that no longer exist are discarded.
+#The default ledger belongs to the current user. Users sharing a node share a ledger 
+#with "resource_file" in a group-writable directory, and a umask allowing group writes.
+#If the ledger or its lock cannot be used, segments run without brokering.
+
+# --- Capacity ---
+def node_CPUs():
+    return multiprocessing.cpu_count()
+
+def node_memory_GB():
+    try:
+        with open('/proc/meminfo', 'r') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) / 1048576.0
+    except IOError:
+        pass
+    return None
+
+#Convert Memory Settings Such as "10G" or "512M" to Gigabytes
+def memory_GB(memory):
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$', str(memory), re.IGNORECASE)
+    if not match:
+        print_except('Memory Setting: %s Not Understood.' % memory)
+    return float(match.group(1)) * MEMORY_UNITS[match.group(2).upper()]
+
+#Format Gigabytes in the Form Used by Segment Memory Settings, Such as "10G"
+def memory_string(gigabytes):
+    if gigabytes >= 1:
+        return '%iG' % int(gigabytes)
+    return '%iM' % int(gigabytes * 1024)
+
+
+# --- Ledger ---
+def resource_file_name(options=None):
+    if options and options.get('resource_file', None):
+        return os.path.abspath(options['resource_file'])
+    return os.environ.get(RESOURCE_FILE_VARIABLE, RESOURCE_FILE_NAME)
+
+#Read Current Grants. A ledger that exists but cannot be read raises IOError rather
+#than being taken as empty, which would oversubscribe the node.
+def read_grants(resource_file):
+    if not os.path.isfile(resource_file):
+        return {}
+    try:
+        with open(resource_file, 'r') as resource_object:
+            contents = json.load(resource_object)
+    except ValueError:
+        return {}
+    grants = contents.get('grants', {}) if isinstance(contents, dict) else {}
+    for grant_id in grants.keys():
+        if not process_exists(grants[grant_id]['pid']):
+            del grants[grant_id]
+    return grants
+
+def write_grants(resource_file, grants):
+    resource_directory = os.path.dirname(resource_file) or '.'
+    (temp_handle, temp_name) = tempfile.mkstemp(prefix='.TFLOW.auto.resources.',
+                                                dir=resource_directory)
+    try:
+        with os.fdopen(temp_handle, 'w') as temp_object:
+            json.dump({'grants':grants}, temp_object, indent=1)
+        os.chmod(temp_name, umask_file_mode())
+        os.rename(temp_name, resource_file)
+    except (IOError, OSError):
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+
+def print_ledger_warning(resource_file, error):
+    print_warning('Resource Ledger: %s Not Usable (%s), ' % (resource_file, error)
+                  + 'Running Without Resource Brokering.')
+
+
+# --- Requests ---
+#Reserve CPUs and Memory (in GB) for the Current Process. If the request does not fit
+#beside existing grants, CPUs are reduced to what is free when "shrink" is set, and 
+#memory only when "shrink_memory" is also set, as too little memory fails a job late. 
+#Otherwise the request waits until enough is released. Returns the Grant Dictionary,
+#or None if Not Waiting and Unavailable, or if the Ledger Cannot be Used.
+def request_resources(CPU, memory=None, job_type='', project_directory='',
+                      resource_file=None, shrink=True, capacity_CPU=None,
+                      capacity_memory=None, wait=True, shrink_memory=False):
+    resource_file = resource_file or resource_file_name()
+    capacity_CPU = int(capacity_CPU or node_CPUs())
+    if capacity_memory:
+        capacity_memory = memory_GB(capacity_memory)
+    else:
+        capacity_memory = node_memory_GB()
+    CPU = min(max(int(CPU), MIN_CPU), capacity_CPU)
+    if memory is not None and capacity_memory:
+        memory = min(memory, capacity_memory)
+    min_CPU = (MIN_CPU if shrink else CPU)
+    if memory is None:
+        min_memory = None
+    elif shrink and shrink_memory:
+        min_memory = min(MIN_MEMORY_GB, memory)
+    else:
+        min_memory = memory
+    grant_id = '%i-%s' % (os.getpid(), job_type)
+
+    waiting_printed = False
+    while True:
+        try:
+            with FileLock(resource_file):
+                grants = read_grants(resource_file)
+                free_CPU = capacity_CPU - sum(grant['CPU'] for grant in grants.values())
+                granted_CPU = min(CPU, free_CPU)
+                granted_memory = None
+                memory_fits = True
+                if memory is not None:
+                    if capacity_memory:
+                        free_memory = capacity_memory - sum(grant['memory_GB'] or 0
+                                                            for grant in grants.values())
+                        granted_memory = min(memory, free_memory)
+                        memory_fits = granted_memory >= min_memory
+                    else:
+                        granted_memory = memory
+
+                if granted_CPU >= min_CPU and memory_fits:
+                    grant = {'pid':os.getpid(), 'CPU':granted_CPU, 
+                             'memory_GB':granted_memory, 'job_type':job_type, 
+                             'project_directory':project_directory}
+                    grants[grant_id] = grant
+                    write_grants(resource_file, grants)
+                    grant['grant_id'] = grant_id
+                    grant['resource_file'] = resource_file
+                    return grant
+        except (IOError, OSError) as error:
+            print_ledger_warning(resource_file, error)
+            return None
+
+        if not wait:
+            return None
+        if not waiting_printed:
+            print ('Waiting for Resources: %i CPU(s)' % CPU
+                   + (', %s Memory' % memory_string(memory) if memory is not None else '')
+                   + ' (Ledger: %s)' % resource_file)
+            waiting_printed = True
+        sleep(RESOURCE_POLL_INTERVAL)
+
+def release_resources(grant):
+    if not grant:
+        return
+    try:
+        with FileLock(grant['resource_file']):
+            grants = read_grants(grant['resource_file'])
+            if grant['grant_id'] in grants:
+                del grants[grant['grant_id']]
+                write_grants(grant['resource_file'], grants)
+    except (IOError, OSError) as error:
+        print_ledger_warning(grant['resource_file'], error)
+
+#Request Resources for a Segment's "max_CPU" and "max_memory" Settings, Replace the
+#Settings in "options" with the Amounts Granted, and Return the Grant. Returns None
+#Without Reserving if the Segment Sets Neither, "use_broker" is Disabled, or the Ledger
+#Cannot be Used, Leaving the Settings Unchanged.
+def request_segment_resources(options):
+    if options.get('use_broker', True) in [False, None, '', 'False', 'false', 'F', 'f', '0']:
+        return None
+    if not options.get('max_CPU', None) and not options.get('max_memory', None):
+        return None
+
+    memory = (memory_GB(options['max_memory']) if options.get('max_memory', None) else None)
+    shrink = options.get('broker_shrink', True) not in [False, 'False', 'false', 'F', 'f', '0']
+    shrink_memory = options.get('broker_shrink_memory', False) in [True, 'True', 'true', 
+                                                                  'T', 't', '1']
+    grant = request_resources(options.get('max_CPU', None) or MIN_CPU, memory,
+                              job_type=options.get('job_type', ''),
+                              project_directory=options.get('project_directory', ''),
+                              resource_file=resource_file_name(options), shrink=shrink,
+                              capacity_CPU=options.get('broker_CPUs', None),
+                              capacity_memory=options.get('broker_memory', None),
+                              shrink_memory=shrink_memory)
+    if grant is None:
+        return None
+
+    if options.get('max_CPU', None):
+        if int(options['max_CPU']) != grant['CPU']:
+            print_warning('Requested max_CPU: %s Reduced to Available: %i'
+                          % (options['max_CPU'], grant['CPU']))
+        options['max_CPU'] = str(grant['CPU'])
+    if memory is not None:
+        granted_memory = memory_string(grant['memory_GB'])
+        if granted_memory != memory_string(memory):
+            print_warning('Requested max_memory: %s Reduced to Available: %s'
+                          % (options['max_memory'], granted_memory))
+        options['max_memory'] = granted_memory
+    options['resource_grant'] = '%s  (CPU: %i%s)' % (grant['grant_id'], grant['CPU'],
+                                (', Memory: %s' % memory_string(grant['memory_GB'])
+                                 if grant['memory_GB'] is not None else ''))
+    return grant
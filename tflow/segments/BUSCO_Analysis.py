@@ -108,6 +108,11 @@ REQUIRED_SETTINGS = ['blast_command_list', 'blast_db_command_list', 'working_dir
                      'print_missing_genes', 'write_command', 'write_report', 'write_pid', 
                      'print_matches']
 
+INPUT_SETTINGS = ['absolute_input_analysis_file', 'rel_input_analysis_file', 'result_name_file']
+
+#Optional Settings that Change Results, Included in the Step Fingerprint
+FINGERPRINT_SETTINGS = ['BUSCO_file']
+
 REQUIRED_ANALYSIS_SETTINGS = ['blast_result_file', 'evalue_cutoff', 'print_missing_genes',
                               'print_matches', 'write_report']
 
@@ -22,7 +22,8 @@ from .parser_class import OutputParser
 from ..util import (print_exit, print_warning, write_file, write_report, read_file, 
                     delete_pid_file, stop_TFLOW_process)
 from .. import util
-from ..fasta import label_sequences, check_N50_in_place, check_FASTA
+from ..fasta import (check_N50_in_place, check_FASTA, combine_files, SequenceRenamer, 
+                     FASTA_BLOCK_SIZE)
 
 if hasattr(local_settings, 'CAP3_LOCATION'):
     CAP3_LOCATION = local_settings.CAP3_LOCATION
@@ -67,8 +68,14 @@ DEFAULT_SETTINGS = {'working_directory':'CAP3',
 REQUIRED_SETTINGS = ['command_list', 'working_directory', 'write_report', 'write_command', 
                      'write_pid', 'combined_input_name', 'write_result_name']
 
+INPUT_SETTINGS = ['absolute_input_file', 'relative_input_file', 'absolute_input_files',
+                  'relative_input_files', 'result_name_file']
+
 REQUIRED_ANALYSIS_SETTINGS = ['working_directory', 'write_report']
 
+#Optional Settings that Change Results, Included in the Step Fingerprint
+FINGERPRINT_SETTINGS = ['label']
+
 
 class Parser(OutputParser):
     def set_local_defaults(self):
@@ -247,11 +254,9 @@ def run(options):
             for input_file_name in input_files:
                 print 'Adding Sequences from File: %s' % input_file_name
                 sys.stdout.flush()
-                input_file = open(input_file_name, 'r')
-                for line in input_file:
-                    combined_seq_file.write(line)
+                with open(input_file_name, 'r') as input_file:
+                    shutil.copyfileobj(input_file, combined_seq_file, FASTA_BLOCK_SIZE)
                 combined_seq_file.flush()
-                input_file.close()
 
         print 'Creation of Combined Input File: %s Completed.' % combined_seq_file_name
         print ''
@@ -345,23 +350,17 @@ def run(options):
             print_exit('Expected Output %s Not Found!' % expected_output)
 
     print 'All CAP3 Outputs Found!'
+    concatenated_output = os.path.join(options['working_directory'],
+                                       input_file + '.cap.combined')
     if 'label' in options and options['label']:
         print 'Labeling Singlets and Contigs from Output Files with Label: %s' % options['label']
+        renamer = SequenceRenamer(prefix=options['label'])
+    else:
+        renamer = None
 
-        label_sequences(expected_output_contigs, options['label'])
-        label_sequences(expected_output_singlets, options['label'])
-        expected_output_contigs += '.labeled'
-        expected_output_singlets += '.labeled'
-
-    concatenated_output = os.path.join(options['working_directory'],
-                                       input_file + '.cap.combined')
     print 'Creating Concatenated Output CAP3 Sequence File: %s' % concatenated_output
-    with open(concatenated_output, 'w') as cat_file:
-        for expected_output in [expected_output_contigs, expected_output_singlets]:
-            expected_output_file = open(expected_output, 'r')
-            for line in expected_output_file:
-                cat_file.write(line)
-            expected_output_file.close()
+    combine_files([expected_output_contigs, expected_output_singlets], concatenated_output,
+                  renamer=renamer)
 
     if options['write_result_name']:
         report_name_file_name = os.path.join(options['working_directory'],
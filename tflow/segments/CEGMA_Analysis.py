@@ -88,6 +88,9 @@ REQUIRED_SETTINGS = ['blast_command_list', 'blast_db_command_list', 'working_dir
                      'evalue_cutoff', 'print_missing_genes', 'write_command', 'write_report', 
                      'write_pid', 'print_matches']
 
+INPUT_SETTINGS = ['absolute_input_analysis_file', 'rel_input_analysis_file', 'result_name_file',
+                  'CEGMA_file']
+
 REQUIRED_ANALYSIS_SETTINGS = ['CEGMA_file', 'blast_result_file', 'evalue_cutoff', 
                               'working_directory', 'print_missing_genes', 'write_report', 
                               'print_matches']
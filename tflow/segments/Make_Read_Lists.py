@@ -54,6 +54,8 @@ DEFAULT_SETTINGS = {'is_paired_reads':True,
 #REQUIRED_SETTINGS = ['command_list', 'is_paired_reads', 'read_type', 'write_command']
 REQUIRED_SETTINGS = ['is_paired_reads', 'read_type']
 
+INPUT_SETTINGS = ['raw_reads', 'raw_left_reads', 'raw_right_reads']
+
 class Parser(OutputParser):
     def set_local_defaults(self):
         self.milestones = MILESTONES
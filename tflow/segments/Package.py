@@ -10,7 +10,6 @@ import subprocess
 import os.path
 import sys
 import shutil
-import gzip
 
 if __name__ == "__main__" and __package__ is None:
     sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../'))
@@ -18,8 +17,12 @@ if __name__ == "__main__" and __package__ is None:
     __package__ = "tflow.segments"
 
 from .parser_class import OutputParser
-from ..util import (print_exit, write_file, read_file, stop_TFLOW_process, delete_pid_file)
+from ..util import (print_exit, write_file, write_report, read_file, stop_TFLOW_process, 
+                    delete_pid_file, SI_prefix, flexible_boolean)
 from .. import util
+from ..compression import (compress_file, is_compressed, BGZF_block_offsets, write_BGZF_index,
+                           BGZF_index_name, COMPRESSED_FORMATS)
+from ..fasta import build_FASTA_index, write_FASTA_index, FASTA_index_name
 
 JOB_TYPE = 'Package'
 PROGRAM_URL = None
@@ -38,16 +41,26 @@ FAILURE_FLAGS = ['Exiting Early...',
                  'Not Found']
 
 DEFAULT_SETTINGS = {'packaged_file_name':'Final_Assembly.fa',
+                    'package_format':'gzip',
+                    'compression_level':'6',
+                    'keep_uncompressed':False,
+                    'write_index':True,
+                    'max_CPU':'4',
                     #TFLOW Settings
                     #'command_list':COMMAND_LIST,
                     #'test_command':TEST_COMMAND,
                     'program_URL':PROGRAM_URL,
                     'segment_for_version':SEGMENT_FOR_VERSION,
                     #TFLOW Writing Defaults, Used if Global Not Set
+                    'write_report':True,
                     #'write_command':True,
                     }
                     
-REQUIRED_SETTINGS = ['out_file', 'working_directory', 'packaged_file_name']
+REQUIRED_SETTINGS = ['out_file', 'working_directory', 'packaged_file_name', 
+                     'package_format', 'compression_level', 'keep_uncompressed', 'write_index',
+                     'max_CPU', 'write_report']
+
+INPUT_SETTINGS = ['absolute_sequence_file', 'rel_sequence_file', 'result_name_file']
 
 class Parser(OutputParser):
     def set_local_defaults(self):
@@ -75,8 +88,17 @@ def read(options):
 def stop(options):
     print '    Job Stopping Not Applicable'
 
+#Return Names of the Uncompressed and Compressed Packaged Files
+def packaged_file_names(packaged_file_name):
+    if packaged_file_name.endswith('.gz'):
+        return (packaged_file_name[:-len('.gz')], packaged_file_name)
+    else:
+        return (packaged_file_name, packaged_file_name + '.gz')
+
 def clean(options):
-    out_files = [options['packaged_file_name'], options['packaged_file_name']+'.gz']
+    (file_name, zip_file_name) = packaged_file_names(options['packaged_file_name'])
+    out_files = [file_name, zip_file_name, BGZF_index_name(zip_file_name),
+                 FASTA_index_name(zip_file_name)]
     remove_outfile = (options['mode'] == 'reset')
     util.clean_TFLOW_auto_files(options['job_type'], options['project_directory'],
                                 options['working_directory'], remove_outfile=remove_outfile, 
@@ -94,6 +116,36 @@ def analyze(options):
     print 'No Analysis Applicable to %s Segment.' % JOB_TYPE
     return ''
 
+def formatted_size(size):
+    (formatted_number, prefix) = SI_prefix(size)
+    return str(formatted_number) + ' ' + prefix + 'B'
+
+def package_report(results, options):
+    if results['in_size']:
+        ratio = '%.2f' % (float(results['out_size']) / results['in_size'])
+    else:
+        ratio = 'N/A'
+    return {'report_type':'package', 
+            'Format':options['package_format'], 
+            'InSize':formatted_size(results['in_size']),
+            'OutSize':formatted_size(results['out_size']),
+            'Ratio':ratio,
+            'Blocks':str(len(results['block_sizes'])),
+            'CPUs':str(options['max_CPU'])}
+
+#Write BGZF Block Index and FASTA Name Index for Random Access to Packaged File.
+#The FASTA index is built from the uncompressed input, whose offsets are the same as
+#those of the decompressed package.
+def write_package_indexes(full_input_file, zip_file_name, results):
+    block_index_file = BGZF_index_name(zip_file_name)
+    print 'Writing BGZF Block Index: %s' % block_index_file
+    write_BGZF_index(BGZF_block_offsets(results['block_sizes']), block_index_file)
+
+    name_index_file = FASTA_index_name(zip_file_name)
+    print 'Writing FASTA Sequence Index: %s' % name_index_file
+    write_FASTA_index(zip_file_name, build_FASTA_index(full_input_file))
+    print ''
+
 def run(options):
     if __name__ != '__main__' and options['is_pipe']:
         out_file = open(options['out_file'], 'w')
@@ -152,8 +204,10 @@ def run(options):
         print_exit('Input Sequence File: %s Not Found.' % full_input_file)
 
     full_output_file = os.path.join(options['working_directory'], options['packaged_file_name'])
+    (full_output_file, zip_file_name) = packaged_file_names(full_output_file)
 
-    if os.path.relpath(full_input_file, full_output_file) != '.':
+    if (flexible_boolean(options['keep_uncompressed']) 
+        and os.path.relpath(full_input_file, full_output_file) != '.'):
         print 'Copying Final Result Sequence File:'
         print '    ' + full_input_file
         print 'To Location:'
@@ -162,18 +216,31 @@ def run(options):
 
         shutil.copyfile(full_input_file, full_output_file)
 
-    if not full_output_file.endswith('.gz'):
+    if is_compressed(full_input_file):
+        print 'Final Result Sequence File is Already Compressed, Copying To Location:'
+        print '    ' + zip_file_name
+        print ''
+        if os.path.relpath(full_input_file, zip_file_name) != '.':
+            shutil.copyfile(full_input_file, zip_file_name)
+
+    else:
+        if options['package_format'] not in COMPRESSED_FORMATS:
+            print_exit('Package Format: %s Not Recognized, ' % options['package_format']
+                       + 'Must be One of: %s' % ', '.join(COMPRESSED_FORMATS))
+
         print 'Zipping Final Result Sequence File:'
-        print '    ' + full_output_file
+        print '    ' + full_input_file
+        print 'To Location:'
+        print '    ' + zip_file_name
+        print 'Using Format: %s, with up to %s Processes' % (options['package_format'], 
+                                                            options['max_CPU'])
         print ''
         sys.stdout.flush()
 
-        zip_file_name = full_output_file + '.gz'
-    
-        with open(full_output_file, 'r') as output_file_object, \
-             gzip.open(zip_file_name, 'w') as zip_file_object:
-            for line in output_file_object:
-                zip_file_object.write(line)
+        results = compress_file(full_input_file, zip_file_name, 
+                                compression_format=options['package_format'], 
+                                max_CPU=int(options['max_CPU']),
+                                level=int(options['compression_level']))
                                
         if os.path.isfile(zip_file_name):
             print 'Zipped Sequence File: %s Created Successfully.' % zip_file_name
@@ -181,6 +248,19 @@ def run(options):
         else:                              
             print_exit('Expected Output Zipped Sequence File: %s ' % zip_file_name
                        + 'Cannot Be Found.' )
+
+        if options['package_format'] == 'bgzf' and flexible_boolean(options['write_index']):
+            write_package_indexes(full_input_file, zip_file_name, results)
+
+        report_dict = package_report(results, options)
+        print 'Compressed %s to %s, Ratio: %s' % (report_dict['InSize'], 
+                                                  report_dict['OutSize'],
+                                                  report_dict['Ratio'])
+        print ''
+        if options['write_report']:
+            report_file = os.path.join(options['working_directory'],
+                                       JOB_TYPE + '.report')
+            write_report(report_file, report_dict)
                                    
     print 'Sequence File Packaging Complete'
 
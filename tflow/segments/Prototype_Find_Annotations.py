@@ -111,21 +111,10 @@ class Parser(OutputParser):
         self.failure_flags = FAILURE_FLAGS
         self.job_type = JOB_TYPE
 
+    #Count Lines Beginning with "# Query:", Read in Large Blocks
     def check_queries_processed(self, blast_file_name):
-        count = 0
-        if self.shell_tracking:
-            try:
-                string_count = subprocess.check_output(['grep', '-c', '# Query:', 
-                                                        blast_file_name])
-                count = int(string_count.strip())
-            except subprocess.CalledProcessError:
-                util.print_warning('Problem with Shell Query Checking? Continuing...')
-        else:
-            with open(blast_file_name, 'r') as blast_file:
-                for line in blast_file:
-                    if line.startswith('# Query:'):
-                        count += 1
-        return count
+        with open(blast_file_name, 'rb') as blast_file:
+            return util.count_in_blocks(blast_file, '\n# Query:', prefix='\n')[0]
 
     def annotation_track(self, options, loud=False):
         from time import sleep
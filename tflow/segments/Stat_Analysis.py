@@ -47,6 +47,9 @@ DEFAULT_SETTINGS = {'copy_input_file':False,
                     }
 
 REQUIRED_SETTINGS = ['working_directory', 'copy_input_file', 'write_report']
+
+INPUT_SETTINGS = ['absolute_input_analysis_file', 'rel_input_analysis_file', 'result_name_file']
+
 REQUIRED_ANALYSIS_SETTINGS = REQUIRED_SETTINGS
 
 class Parser(OutputParser):
@@ -167,7 +170,8 @@ def analyze(options):
     analysis += 'Performing Statistical Analysis on File:\n'
     analysis += '    %s\n' % full_input_file
 
-    results = check_N50_in_place(full_input_file, fail_exit=False, return_report_dict=True)
+    results = check_N50_in_place(full_input_file, fail_exit=False, return_report_dict=True,
+                                 genome_size=options.get('genome_size', None))
     if isinstance(results, tuple):
         report_analysis, report_dict = results
         analysis += report_analysis
@@ -51,6 +51,9 @@ DEFAULT_SETTINGS = {'write_report':True,
 #                     'working_directory']
 REQUIRED_SETTINGS = ['out_file', 'write_report', 'write_csv_report', 'working_directory']
 
+#Optional Settings that Change Results, Included in the Step Fingerprint
+FINGERPRINT_SETTINGS = ['pipe_steps']
+
 class Parser(OutputParser):
     def set_local_defaults(self):
         self.milestones = MILESTONES
@@ -64,6 +67,15 @@ def check_done(options):
     failure_exit = (options['mode'] in ['run', 'track'])
     return parser.check_completion(failure_exit)
 
+#Summary Inputs are the Reports of Other Steps, Used for the Step Fingerprint
+def input_files(options):
+    report_files = []
+    for (path,dirs,files) in os.walk(options['working_directory']):
+        for file_name in files:
+            if file_name.endswith('.report') and file_name != 'Summary.report':
+                report_files.append(os.path.join(path, file_name))
+    return sorted(report_files)
+
 def track(options):
     parser = Parser()
     parser.out_file = options['out_file']
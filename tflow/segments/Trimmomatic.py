@@ -10,6 +10,10 @@ import subprocess
 import optparse
 import os
 import sys
+import json
+import glob
+import shutil
+from time import sleep
 from collections import OrderedDict
 
 if __name__ == "__main__" and __package__ is None:
@@ -32,6 +36,7 @@ from ..util import (print_exit, print_warning, print_error, read_file_list, writ
                     write_file_list, delete_pid_file, count_FASTQ_all, ensure_FASTQ_GZ, 
                     percent_string, print_warning, stop_TFLOW_process)
 from .. import util
+from ..cache import file_fingerprint
 
 from .parser_class import OutputParser
 
@@ -55,6 +60,7 @@ FAILURE_FLAGS = ['Exiting Early...',
                  'Not Found']
 DEFAULT_SETTINGS = {'is_paired_reads':True,
                     'max_CPU':'4',
+                    'concurrent_lanes':'1',
                     #FileNaming
                     'output_directory':'Trimmed_Reads',
                     'left_read_indicator':'R1_',
@@ -84,6 +90,9 @@ DEFAULT_SETTINGS = {'is_paired_reads':True,
 REQUIRED_SETTINGS = ['is_paired_reads', 'working_directory', 'write_report', 'write_command', 
                      'write_pid']
 
+INPUT_SETTINGS = []
+INPUT_LIST_SETTINGS = ['raw_left_reads_list', 'raw_right_reads_list', 'raw_single_reads_list']
+
 TRIM_SETTINGS_DICT = OrderedDict()
 TRIM_SETTINGS_DICT['adapater_trimming'] = ('ILLUMINACLIP:' + TRIMMOMATIC_LOCATION + '/adapters/')
 TRIM_SETTINGS_DICT['leading_quality'] = 'LEADING:'
@@ -123,15 +132,27 @@ def stop(options):
     job_pid_file = os.path.join(options['working_directory'],
                                 JOB_TYPE + '.auto.pid')
     stop_TFLOW_process(job_pid_file, JOB_TYPE)
+    for lane_pid_file in sorted(glob.glob(os.path.join(options['working_directory'], 
+                                                       JOB_TYPE + '.lane*.auto.pid'))):
+        stop_TFLOW_process(lane_pid_file, os.path.basename(lane_pid_file).split('.auto')[0])
 
 def clean(options):
     remove_outfile = (options['mode'] == 'reset')
     files = [options['single_reads_list'], options['left_reads_list'], 
                  options['right_reads_list']]
+    #Lane Logs and PID Files Left by Interrupted Concurrent Trimming, Lane Logs are 
+    #Written Beside Lane Output, in the Output Directory if Given
+    patterns = ['*' + LANE_LOG_SUFFIX, JOB_TYPE + '.lane*' + LANE_PID_SUFFIX]
+    if 'output_directory' in options:
+        patterns.append(os.path.join(options['output_directory'], '*' + LANE_LOG_SUFFIX))
+    for pattern in patterns:
+        files += [os.path.relpath(file_name, options['working_directory']) for file_name in
+                  glob.glob(os.path.join(options['working_directory'], pattern))]
 
     util.clean_TFLOW_auto_files(options['job_type'], options['project_directory'],
                                 options['working_directory'], remove_outfile=remove_outfile, 
-                                confirm=options['confirm'], files=files)
+                                confirm=options['confirm'], files=files, 
+                                suffixes=[LANE_RECORDS_SUFFIX])
 
 def test(options, silent=False):
     try:
@@ -173,6 +194,372 @@ def test(options, silent=False):
     return output
 
 
+# --- Lane Trimming ---
+LANE_RECORDS_SUFFIX = '.auto.lanes'
+LANE_PID_SUFFIX = '.auto.pid'
+LANE_LOG_SUFFIX = '.trim.out'
+LANE_POLL_INTERVAL = 2
+
+def lane_output_keys(options):
+    if options['is_paired_reads']:
+        return ['left_paired', 'right_paired', 'left_unpaired', 'right_unpaired']
+    return ['single_reads']
+
+def trim_settings_list(options):
+    action_list = []
+    for trim_setting in TRIM_SETTINGS_DICT:
+        if trim_setting in options:
+            setting = options[trim_setting]
+            if isinstance(setting, list):
+                setting = ':'.join(options[trim_setting])
+            action_list.append(TRIM_SETTINGS_DICT[trim_setting] + setting)
+    return action_list
+
+#Return Dictionary Describing Trimmomatic Command and Expected Output Files for Lane
+def lane_plan(options, read, threads=None):
+    full_read = os.path.join(options['working_directory'], read)
+    threads_list = ['-threads', str(threads or options['max_CPU'])]
+    threads = ' '.join(threads_list)
+    action_list = trim_settings_list(options)
+    base_name = os.path.basename(read)
+    base_name = base_name.rstrip('gz').rstrip('.').rstrip('fastq').rstrip('.')
+    trim_log_name =  base_name + '.trimlog'
+    if 'output_directory' in options:
+        trim_log_name = os.path.join(options['output_directory'], trim_log_name)
+    trim_log_list = ['-trimlog', trim_log_name]
+    trim_log = ' '.join(trim_log_list)
+    notes = []
+
+    #Prepare Command for Paired Reads
+    if options['is_paired_reads']:
+        mode = 'PE'
+        out_base_name = ''.join(base_name.split(options['left_read_indicator']))
+        out_read = out_base_name + '.fq'
+
+        if out_base_name == base_name:
+            out_base_name = base_name + '-Trimmed'
+            out_read = out_base_name + '.fq'
+            notes.append('Identifier: "%s" for Left Read ' % options['left_read_indicator']
+                         + 'Not Found. Using Default Naming: %s' % out_read)
+
+        if 'output_directory' in options:
+            out_read = os.path.join(options['output_directory'], out_read)
+            out_base_name = os.path.join(options['output_directory'], out_base_name)
+
+        full_out_read = os.path.join(options['working_directory'], out_read)
+        base_out_list = ['-baseout', full_out_read]
+        base_in_list = ['-basein', full_read]
+
+        expected_out_files = OrderedDict()
+        expected_out_files['left_paired'] = out_base_name + '_1P.fq'
+        expected_out_files['right_paired'] = out_base_name + '_2P.fq'
+        expected_out_files['left_unpaired'] = out_base_name + '_1U.fq'
+        expected_out_files['right_unpaired'] = out_base_name + '_2U.fq'
+
+        command_segments = ([options['command'], mode, threads, ' '.join(base_out_list), 
+                             ' '.join(base_in_list), trim_log] + action_list)
+
+        command_list = (list(options['command_list']) + [mode] + threads_list + base_out_list 
+                        + base_in_list + trim_log_list + action_list)
+
+    #Prepare Command for Unpaired Reads
+    else:
+        mode = 'SE'
+        out_base_name = base_name + '-Trimmed'
+        out_read = out_base_name + '.fq'
+
+        if 'output_directory' in options:
+            out_read = os.path.join(options['output_directory'], out_read)
+            out_base_name = os.path.join(options['output_directory'], out_base_name)
+
+        full_out_read = os.path.join(options['working_directory'], out_read)
+
+        expected_out_files = OrderedDict()
+        expected_out_files['single_reads'] = out_read
+
+        command_segments = ([options['command'], mode, threads, trim_log,
+                             full_read, full_out_read] + action_list)
+
+        command_list = (list(options['command_list']) + [mode] + threads_list + trim_log_list
+                        + [full_read] + [full_out_read] + action_list)
+
+    expected_full_out_files = OrderedDict()
+    for out_file in expected_out_files:
+        expected_full_out_files[out_file] = os.path.join(options['working_directory'],
+                                                         expected_out_files[out_file])
+
+    return {'read':read, 'full_read':full_read, 'out_base_name':out_base_name, 
+            'threads':threads_list[1],
+            'full_log':os.path.join(options['working_directory'], 
+                                    out_base_name + LANE_LOG_SUFFIX),
+            'expected_out_files':expected_out_files, 
+            'expected_full_out_files':expected_full_out_files, 'action_list':action_list,
+            'command_segments':command_segments, 'command_list':command_list, 'notes':notes,
+            'record_command':' '.join(command_list).replace(' ' + threads, '', 1)}
+
+def print_lane_plan(lane, out_stream=None):
+    out_stream = out_stream or sys.stdout
+    for note in lane['notes']:
+        print >> out_stream, note
+    print >> out_stream, ''
+    print >> out_stream, '  Output File Basename: %s' % lane['out_base_name']
+    print >> out_stream, '  Expected Output Files:'
+    for file_name in lane['expected_out_files'].values():
+        print >> out_stream, '   ', file_name
+    print >> out_stream, ''
+    print >> out_stream, '  Trim Settings:'
+    for formatted_setting in lane['action_list']:
+        print >> out_stream, '   ', formatted_setting.strip()
+    print >> out_stream, ''  
+    print >> out_stream, '  Running Command with Segments:'
+    for segment in lane['command_segments']:
+        print >> out_stream, '    ' + segment
+    print >> out_stream, ''
+    print >> out_stream, ' '.join(lane['command_list'])
+    print >> out_stream, ''
+
+#Run Trimmomatic Command for Lane with Output to "out_stream", Return Exit Code
+def run_lane(options, lane, out_stream):
+    process = subprocess.Popen(lane['command_list'], stdout=out_stream, stderr=out_stream,
+                               cwd=options['working_directory'])
+    try:
+        if options['write_pid']:
+            pid_file_name = os.path.join(options['working_directory'], 
+                                         options['job_type'] + '.auto.pid')
+            write_file(pid_file_name, str(process.pid))
+        process.wait()
+
+        if options['write_pid']:
+            delete_pid_file(pid_file_name)
+
+    except KeyboardInterrupt:
+        print ''
+        print 'Killing Trimmomatic Process'
+        process.kill()
+        raise
+
+    return process.returncode
+
+#Return Completion Record of Trimmed Lane, Giving Read Counts and the Size of Each 
+#Output File, or None if No Output Files Were Found
+def lane_record(options, lane, starting_reads, out_stream=None):
+    out_stream = out_stream or sys.stdout
+    print >> out_stream, ''
+    print >> out_stream, '  Output Files:'
+    if not any(os.path.isfile(x) for x in lane['expected_full_out_files'].values()):
+        print >> out_stream, ' ', 
+        print_warning('No Output Files Found for File: %s ' % lane['read'])
+        print >> out_stream, ''
+        print >> out_stream, ''
+        return None
+
+    out_files = OrderedDict()
+    for out_file in lane['expected_full_out_files']:
+        full_out_file = lane['expected_full_out_files'][out_file]
+        if os.path.isfile(full_out_file):
+            print >> out_stream, '    Found:', lane['expected_out_files'][out_file]
+            out_files[out_file] = [lane['expected_out_files'][out_file], 
+                                   os.path.getsize(full_out_file)]
+
+    if options['is_paired_reads']:
+        final_reads = count_FASTQ_all(lane['expected_full_out_files']['left_paired'])
+    else:
+        final_reads = count_FASTQ_all(lane['expected_full_out_files']['single_reads'])
+
+    return {'read':lane['read'], 'input':file_fingerprint(lane['full_read']),
+            'command':lane['record_command'], 'starting_reads':starting_reads, 
+            'final_reads':final_reads, 'out_files':out_files}
+
+def print_lane_result(record, out_stream=None):
+    out_stream = out_stream or sys.stdout
+    print >> out_stream, ''
+    print >> out_stream, 'Finished With File:', record['read']
+    print >> out_stream, 'Starting Reads:', record['starting_reads']
+    print >> out_stream, 'Final Reads:', record['final_reads']
+    print >> out_stream, percent_string(record['final_reads'], record['starting_reads']), 
+    print >> out_stream, 'Remaining.'
+    print >> out_stream, ''
+
+#Lane Records are Valid if the Input File, Command (Apart from Threads), and Output File 
+#Sizes are Unchanged
+def valid_lane_record(options, lane, record):
+    if record.get('input') != file_fingerprint(lane['full_read']):
+        return False
+    if record.get('command') != lane['record_command']:
+        return False
+    for (out_file_name, size) in record['out_files'].values():
+        full_out_file_name = os.path.join(options['working_directory'], out_file_name)
+        if not os.path.isfile(full_out_file_name) or os.path.getsize(full_out_file_name) != size:
+            return False
+    return True
+
+def lane_records_file_name(options):
+    return os.path.join(options['working_directory'], JOB_TYPE + LANE_RECORDS_SUFFIX)
+
+def read_lane_records(options):
+    records_file_name = lane_records_file_name(options)
+    if not os.path.isfile(records_file_name):
+        return OrderedDict()
+    try:
+        with open(records_file_name, 'r') as records_file:
+            return json.load(records_file, object_pairs_hook=OrderedDict)
+    except (IOError, ValueError):
+        print_warning('Lane Completion Records: %s Not Readable, ' % records_file_name
+                      + 'All Lanes Will Be Trimmed.')
+        return OrderedDict()
+
+def write_lane_records(options, records):
+    records_file_name = lane_records_file_name(options)
+    with open(records_file_name + '.tmp', 'w') as records_file:
+        json.dump(records, records_file, indent=1)
+    os.rename(records_file_name + '.tmp', records_file_name)
+
+def lane_threads(options, concurrent_lanes):
+    if concurrent_lanes > 1:
+        return str(max(int(options['max_CPU']) // concurrent_lanes, 1))
+    return str(options['max_CPU'])
+
+def print_lane_header(lane, out_stream=None):
+    out_stream = out_stream or sys.stdout
+    print >> out_stream, ''
+    print >> out_stream, ' ----- Trimming File: %s  -----' % lane['read']
+    print >> out_stream, ''
+
+#Record Completed Lane and Print Lane Result if Trimmomatic Exited Normally. Lanes where
+#it did not are left out of the lane results, so their partial output is never used.
+def finish_lane(options, lane, starting_reads, return_code, lane_records, lane_results):
+    if return_code != 0:
+        print_warning('Trimmomatic Exited with Code: %s for File: %s, ' % (return_code, 
+                                                                         lane['read'])
+                      + 'Lane Will Be Trimmed Again if Re-Run.')
+        return
+
+    record = lane_record(options, lane, starting_reads)
+    if record is None:
+        return
+
+    lane_results[lane['read']] = record
+    lane_records[lane['read']] = record
+    write_lane_records(options, lane_records)
+    print_lane_result(record)
+
+#Trim Lanes One at a Time, Return Ordered Dictionary of Lane Records by Read
+def trim_lanes(options, lanes, lane_records):
+    lane_results = OrderedDict()
+    for lane in lanes:
+        print_lane_header(lane)
+        if lane['read'] in lane_records and valid_lane_record(options, lane, 
+                                                              lane_records[lane['read']]):
+            lane_results[lane['read']] = lane_records[lane['read']]
+            print '  Lane Already Trimmed, Using Completion Record.'
+            print_lane_result(lane_results[lane['read']])
+            continue
+
+        starting_reads = count_FASTQ_all(lane['full_read'])
+        print '  Starting Reads:', starting_reads
+        print_lane_plan(lane)
+        sys.stdout.flush()
+
+        return_code = run_lane(options, lane, sys.stdout)
+        sys.stdout.flush()
+        finish_lane(options, lane, starting_reads, return_code, lane_records, lane_results)
+
+    return lane_results
+
+#Trim Up to "concurrent_lanes" Lanes at Once. Each lane's output is written to its own 
+#log file, "<output basename>.trim.out", and logs are copied to the segment output in 
+#lane order as soon as all earlier lanes have finished, then removed.
+def trim_lanes_concurrently(options, lanes, lane_records, concurrent_lanes):
+    print 'Trimming %i Lanes at a Time, with %s Threads Each.' % (concurrent_lanes,
+                                                                 lanes[0]['threads'])
+    lane_results = OrderedDict()
+    waiting = range(len(lanes))
+    running = OrderedDict()
+    finished = set()
+    next_lane = 0
+    terminal_out = sys.stdout
+    try:
+        while waiting or running or next_lane < len(lanes):
+            while waiting and len(running) < concurrent_lanes:
+                index = waiting.pop(0)
+                lane = lanes[index]
+                lane_log = open(lane['full_log'], 'w')
+                sys.stdout = lane_log
+                try:
+                    print_lane_header(lane)
+                    if lane['read'] in lane_records and valid_lane_record(
+                            options, lane, lane_records[lane['read']]):
+                        lane_results[lane['read']] = lane_records[lane['read']]
+                        print '  Lane Already Trimmed, Using Completion Record.'
+                        print_lane_result(lane_results[lane['read']])
+                        finished.add(index)
+                        lane_log.close()
+                        continue
+
+                    starting_reads = count_FASTQ_all(lane['full_read'])
+                    print '  Starting Reads:', starting_reads
+                    print_lane_plan(lane)
+                    lane_log.flush()
+                finally:
+                    sys.stdout = terminal_out
+
+                process = subprocess.Popen(lane['command_list'], stdout=lane_log, 
+                                           stderr=lane_log, cwd=options['working_directory'])
+                if options['write_pid']:
+                    write_file(lane_pid_file_name(options, index), str(process.pid))
+                running[index] = (process, lane_log, starting_reads)
+
+            for index in running.keys():
+                (process, lane_log, starting_reads) = running[index]
+                if process.poll() is None:
+                    continue
+                del running[index]
+                if options['write_pid']:
+                    delete_pid_file(lane_pid_file_name(options, index))
+                sys.stdout = lane_log
+                try:
+                    finish_lane(options, lanes[index], starting_reads, process.returncode,
+                                lane_records, lane_results)
+                finally:
+                    sys.stdout = terminal_out
+                    lane_log.close()
+                finished.add(index)
+
+            while next_lane in finished:
+                with open(lanes[next_lane]['full_log'], 'r') as lane_log:
+                    shutil.copyfileobj(lane_log, sys.stdout)
+                sys.stdout.flush()
+                os.remove(lanes[next_lane]['full_log'])
+                next_lane += 1
+
+            if running:
+                sleep(LANE_POLL_INTERVAL)
+
+    except KeyboardInterrupt:
+        sys.stdout = terminal_out
+        print ''
+        print 'Killing Trimmomatic Processes'
+        for index in running:
+            (process, lane_log, starting_reads) = running[index]
+            process.kill()
+            process.wait()
+            lane_log.close()
+            if options['write_pid']:
+                delete_pid_file(lane_pid_file_name(options, index))
+        raise
+
+    #Return Lane Results in Lane Order
+    ordered_lane_results = OrderedDict()
+    for lane in lanes:
+        if lane['read'] in lane_results:
+            ordered_lane_results[lane['read']] = lane_results[lane['read']]
+    return ordered_lane_results
+
+def lane_pid_file_name(options, index):
+    return os.path.join(options['working_directory'], 
+                        '%s.lane%i%s' % (options['job_type'], index + 1, LANE_PID_SUFFIX))
+
+
 def run(options):
     if __name__ != '__main__' and options['is_pipe']:
         out_file_stream = open(options['out_file'], 'w')
@@ -258,226 +645,50 @@ def run(options):
             print 'Preparing Output Directory: %s' % full_output_directory
             os.makedirs(full_output_directory)
 
-    out_files = OrderedDict()
-    if options['is_paired_reads']:
-        out_files['left_paired'] = []
-        out_files['right_paired'] = []
-        out_files['left_unpaired'] = []
-        out_files['right_unpaired'] = []
-    else:
-        out_files['single_reads'] = []
-
+    #Trim Each Lane, Using Completion Records of Lanes Trimmed by Previous Runs
+    lane_records = read_lane_records(options)
+    concurrent_lanes = max(int(options['concurrent_lanes']), 1)
+    lanes = []
     for read in trim_reads:
         full_read = os.path.join(options['working_directory'], read)
         if not os.path.isfile(full_read):
             print_exit('Input Read File for Trimming: %s Cannot Be Found.' % full_read)
 
-        starting_reads = count_FASTQ_all(full_read)
-        total_count_before += starting_reads
-
-        print ''
-        print ' ----- Trimming File: %s  -----' % read
-        print ''
-        print '  Starting Reads:', starting_reads
-
-        threads_list = ['-threads', options['max_CPU']]
-        threads = ' '.join(threads_list)
-
-        #Prepare Command for Paired Reads
-        if options['is_paired_reads']:
-            mode = 'PE'
-            base_name = os.path.basename(read)
-            base_name = base_name.rstrip('gz').rstrip('.').rstrip('fastq').rstrip('.')
-
-            out_base_name = ''.join(base_name.split(options['left_read_indicator']))
-            out_read = out_base_name + '.fq'
-
-            if out_base_name == base_name:
-                out_base_name = base_name + '-Trimmed'
-                out_read = out_base_name + '.fq'
-                print ('Identifier: "%s" for Left Read ' % options['left_read_indicator']
-                       + 'Not Found. Using Default Naming: %s' % out_read)
-
-            if 'output_directory' in options:
-                out_read = os.path.join(options['output_directory'], out_read)
-                out_base_name = os.path.join(options['output_directory'], out_base_name)
-
-            full_out_read = os.path.join(options['working_directory'], out_read)
-
-            base_out_list = ['-baseout', full_out_read]
-            base_out = ' '.join(base_out_list)
-            base_in_list = ['-basein', full_read]
-            base_in = ' '.join(base_in_list)
-            trim_log_name =  base_name + '.trimlog'
-            if 'output_directory' in options:
-                trim_log_name = os.path.join(options['output_directory'], trim_log_name)
-            trim_log_list = ['-trimlog', trim_log_name]
-            trim_log = ' '.join(trim_log_list)
-
-
-            expected_out_files = OrderedDict()
-            expected_out_files['left_paired'] = out_base_name + '_1P.fq'
-            expected_out_files['right_paired'] = out_base_name + '_2P.fq'
-            expected_out_files['left_unpaired'] = out_base_name + '_1U.fq'
-            expected_out_files['right_unpaired'] = out_base_name + '_2U.fq'
-
-            expected_full_out_files = OrderedDict()
-            for out_file in expected_out_files:
-                expected_full_out_files[out_file] = os.path.join(options['working_directory'],
-                                                                 expected_out_files[out_file])
-
-            print ''
-            print '  Output File Basename: %s' % out_base_name
-            print '  Expected Output Files:'
-            for file_name in expected_out_files.values():
-                print '   ', file_name
-
-            action_list = []
-            print ''
-            print '  Trim Settings:'
-            for trim_setting in TRIM_SETTINGS_DICT:
-                if trim_setting in options:
-                    setting = options[trim_setting]
-                    if isinstance(setting, list):
-                        setting = ':'.join(options[trim_setting])
-
-                    formatted_setting = (TRIM_SETTINGS_DICT[trim_setting] + setting)
-                    action_list.append(formatted_setting)
-                    print '   ', formatted_setting.strip()
-
-            command_segments = ([options['command'], mode, threads,
-                                 base_out, base_in, trim_log] + action_list)
-
-            command_list = (list(options['command_list']) + [mode] + threads_list + base_out_list 
-                            + base_in_list + trim_log_list + action_list)
-
-        #Prepare Command for Unpaired Reads
-        else:
-            mode = 'SE'
-            base_name = os.path.basename(read)
-            base_name = base_name.rstrip('gz').rstrip('.').rstrip('fastq').rstrip('.')
-
-            out_base_name = base_name + '-Trimmed'
-            out_read = out_base_name + '.fq'
-
-            if 'output_directory' in options:
-                out_read = os.path.join(options['output_directory'], out_read)
-                out_base_name = os.path.join(options['output_directory'], out_base_name)
-
-            full_out_read = os.path.join(options['working_directory'], out_read)
-
-            trim_log_name =  base_name + '.trimlog'
-            if 'output_directory' in options:
-                trim_log_name = os.path.join(options['output_directory'], trim_log_name)
-            trim_log_list = ['-trimlog', trim_log_name]
-            trim_log = ' '.join(trim_log_list)
-
-
-            expected_out_files = OrderedDict()
-            expected_out_files['single_reads'] = out_read
-
-            expected_full_out_files = OrderedDict()
-            for out_file in expected_out_files:
-                expected_full_out_files[out_file] = os.path.join(options['working_directory'],
-                                                                 expected_out_files[out_file])
-
-            print ''
-            print '  Output File Basename: %s' % out_base_name
-            print '  Expected Output Files:'
-            for file_name in expected_out_files.values():
-                print '   ', file_name
-
-            action_list = []
-            print ''
-            print '  Trim Settings:'
-            for trim_setting in TRIM_SETTINGS_DICT:
-                if trim_setting in options:
-                    setting = options[trim_setting]
-                    if isinstance(setting, list):
-                        setting = ':'.join(options[trim_setting])
-
-                    formatted_setting = (TRIM_SETTINGS_DICT[trim_setting] + setting)
-                    action_list.append(formatted_setting)
-                    print '   ', formatted_setting.strip()
-
-            command_segments = ([options['command'], mode, threads, trim_log,
-                                 full_read, full_out_read] + action_list)
-
-            command_list = (list(options['command_list']) + [mode] + threads_list + trim_log_list
-                            + [full_read] + [full_out_read] + action_list)
-
-
-        #Run Trimmomatic Command
-        print ''  
-        print '  Running Command with Segments:'
-        for segment in command_segments:
-            print '    ' + segment
-
-        command = ' '.join(command_list)
+        lanes.append(lane_plan(options, read, lane_threads(options, concurrent_lanes)))
         if options['write_command']:
-            command_file.write(command + '\n\n')
-
-        print ''
-        print command
-        print ''
-        sys.stdout.flush()
-
-        try:
-            process = subprocess.Popen(command_list, stdout=sys.stdout, stderr=sys.stderr,
-                                       cwd=options['working_directory'])
-            if options['write_pid']:
-                pid_file_name = os.path.join(options['working_directory'], 
-                                             options['job_type'] + '.auto.pid')
-                write_file(pid_file_name, str(process.pid))
-            process.wait()
-
-            if options['write_pid']:
-                delete_pid_file(pid_file_name)
-
-        except KeyboardInterrupt:
-            if __name__ != '__main__' and options['is_pipe']:
-                sys.stdout, sys.stderr = terminal_out, terminal_error
-                out_file_stream.close()
-            print ''
-            print 'Killing Trimmomatic Process'
-            process.kill()
-            raise
+            command_file.write(' '.join(lanes[-1]['command_list']) + '\n\n')
 
-        sys.stdout.flush()
+    try:
+        if concurrent_lanes > 1:
+            lane_results = trim_lanes_concurrently(options, lanes, lane_records, 
+                                                   concurrent_lanes)
+        else:
+            lane_results = trim_lanes(options, lanes, lane_records)
 
-        print ''
-        print '  Output Files:'
-        if not any(os.path.isfile(x) for x in expected_full_out_files.values()):
-            print ' ', 
-            print_warning('No Output Files Found for File: %s ' % read )
-            print ''
-            print ''
-            continue
+    except KeyboardInterrupt:
+        if __name__ != '__main__' and options['is_pipe']:
+            sys.stdout, sys.stderr = terminal_out, terminal_error
+            out_file_stream.close()
+        raise
 
-        else:
-            for out_file in expected_full_out_files:
-                if os.path.isfile(expected_full_out_files[out_file]):
-                    print '    Found:', expected_out_files[out_file]
-                    print out_files
-                    print expected_out_files
-                    out_files[out_file].append(expected_out_files[out_file])
-
-        if options['is_paired_reads']:
-            final_reads = count_FASTQ_all(os.path.join(options['working_directory'],
-                                                       expected_out_files['left_paired']))
-        else:
-            final_reads = count_FASTQ_all(os.path.join(options['working_directory'],
-                                                       expected_out_files['single_reads']))
+    if options['write_command']:
+        command_file.close()
 
-        total_count_after += final_reads
-        print ''
-        print 'Finished With File:', read
-        print 'Starting Reads:', starting_reads
-        print 'Final Reads:', final_reads
-        print percent_string(final_reads, starting_reads), 'Remaining.'
-        print ''
+    failed_reads = [lane['read'] for lane in lanes if lane['read'] not in lane_results]
+    if failed_reads:
+        print_exit(['Trimming Failed for Read File(s):'] 
+                   + ['  -- ' + read for read in failed_reads]
+                   + ['Completed Lanes are Recorded and Will Not Be Trimmed Again if Re-Run.'])
 
-    command_file.close()
+    #Combine Lane Outputs and Counts in Lane Order
+    out_files = OrderedDict()
+    for out_file in lane_output_keys(options):
+        out_files[out_file] = []
+    for record in lane_results.values():
+        total_count_before += record['starting_reads']
+        total_count_after += record['final_reads']
+        for out_file in record['out_files']:
+            out_files[out_file].append(record['out_files'][out_file][0])
 
     print 'Initial Read Count:', total_count_before
     print 'Final Read Count:  ', total_count_after
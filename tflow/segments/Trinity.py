@@ -149,6 +149,9 @@ DEFAULT_SETTINGS = {'is_paired_reads':True,
 REQUIRED_SETTINGS = ['command_list', 'is_paired_reads', 'read_type', 'max_memory', 'write_report',
                      'write_command', 'write_pid']
 
+INPUT_SETTINGS = ['all_reads', 'left_reads', 'right_reads']
+INPUT_LIST_SETTINGS = ['all_reads_list', 'left_reads_list', 'right_reads_list', 'single_reads_list']
+
 REQUIRED_ANALYSIS_SETTINGS = ['working_directory', 'output_dir', 'out_sequence_file', 
                               'write_report']
 
@@ -220,7 +223,8 @@ def analyze(options):
         return ''
 
     results = check_N50_in_place(full_out_sequence_file, fail_exit=False, 
-                                 return_report_dict=True)
+                                 return_report_dict=True, 
+                                 genome_size=options.get('genome_size', None))
     if isinstance(results, tuple):
         analysis, report_dict = results
     else:
@@ -6,11 +6,56 @@
 #Version 0.9, 04/20/2015
 #Project URL: http://www.github.com/fsugenomics/tflow
 
-from time import sleep
 import os.path
 import sys
-import subprocess
-from ..util import print_except, print_exit
+import re
+import json
+import bisect
+import hashlib
+from time import time
+from ..util import print_except, print_exit, read_last_lines
+from ..watch import FileWatcher
+
+TRACKING_STATE_SUFFIX = '.auto.track'
+TRACKING_STATE_KEYS = ['last_offset', 'partial_line', 'next_milestone_index', 
+                       'current_milestone', 'last_line', 'last_line_index']
+#Output Text is Saved as Latin-1, Which Maps Every Byte to a Character and Back
+TRACKING_STATE_TEXT_KEYS = ['partial_line', 'current_milestone', 'last_line']
+STATE_SAVE_INTERVAL = 10
+SIGNATURE_LENGTH = 4096
+READ_BLOCK_SIZE = 4194304
+
+#Finds Every Occurrence of Any of a Set of Strings in One Pass. A single compiled regular
+#expression, a lookahead over the alternation of all patterns, gives each position at
+#which some pattern starts, and only those positions are checked for which patterns 
+#occur there, so overlapping patterns are all reported.
+class PatternMatcher():
+    def __init__(self, patterns):
+        self.patterns = sorted(set(pattern for pattern in patterns if pattern), 
+                               key=len, reverse=True)
+        self.patterns_by_start = {}
+        for pattern in self.patterns:
+            self.patterns_by_start.setdefault(pattern[0], []).append(pattern)
+        if self.patterns:
+            self.regex = re.compile('(?=%s)' % '|'.join(re.escape(pattern) 
+                                                        for pattern in self.patterns))
+        else:
+            self.regex = None
+
+    #Return Dictionary of Pattern: [Start Positions] for Patterns Occurring in Text
+    def search(self, text, start=0, end=None):
+        hits = {}
+        if self.regex is None:
+            return hits
+        if end is None:
+            end = len(text)
+        for match in self.regex.finditer(text, start, end):
+            position = match.start()
+            for pattern in self.patterns_by_start[text[position]]:
+                if position + len(pattern) <= end and text.startswith(pattern, position):
+                    hits.setdefault(pattern, []).append(position)
+        return hits
+
 
 class OutputParser():
     def __init__(self):
@@ -24,10 +69,14 @@ class OutputParser():
         self.current_milestone = 'Not Started'
         self.last_line = 'Tracking Not Started'
         self.last_line_index = 0
-        self.shell_tracking = True
+        self.last_offset = 0
+        self.partial_line = ''
+        self.use_inotify = True
+        self.save_tracking_state = True
         self.tail_length = 15
         self.done_file_name = None
         self.running = True
+        self.matcher = None
         self.set_local_defaults()
 
     def set(self, settings={}, **kwargs):
@@ -42,12 +91,81 @@ class OutputParser():
     def set_local_defaults(self):
         pass
 
+    #Check Output Each Time the Output File Changes, Until Terminated. Changes are waited
+    #for with inotify where available, otherwise the file is polled every sleep_time.
+    #Tracking state is saved periodically, so that tracking can resume where it stopped.
     def track(self, loud=False):
-        while self.running:
-            if self.check_updated():
-                self.running = self.check(loud)
-            if self.running:
-                sleep(self.sleep_time)
+        if self.save_tracking_state and self.load_state():
+            print 'Resuming Tracking at Milestone: %s' % self.current_milestone
+            print ''
+        watcher = FileWatcher(self.sleep_time, use_inotify=self.use_inotify)
+        watcher.add(self.out_file)
+        last_save_time = time()
+        try:
+            while self.running:
+                if self.check_updated():
+                    self.running = self.check(loud)
+                if self.save_tracking_state and time() - last_save_time > STATE_SAVE_INTERVAL:
+                    self.save_state()
+                    last_save_time = time()
+                if self.running:
+                    watcher.wait()
+        finally:
+            watcher.close()
+            if self.save_tracking_state:
+                self.save_state()
+
+    # --- Tracking State ---
+    def state_file_name(self):
+        return os.path.join(os.path.dirname(self.out_file), self.job_type + TRACKING_STATE_SUFFIX)
+
+    #Hash of the Start of the Output File, to Recognize a Replaced Output File
+    def output_signature(self, length):
+        with open(self.out_file, 'rb') as out_file:
+            return hashlib.sha1(out_file.read(length)).hexdigest()
+
+    def save_state(self):
+        if not self.output_exists():
+            return
+        state = dict((key, getattr(self, key)) for key in TRACKING_STATE_KEYS)
+        for key in TRACKING_STATE_TEXT_KEYS:
+            state[key] = state[key].decode('latin-1')
+        state['out_file'] = os.path.abspath(self.out_file)
+        state['signature_length'] = min(self.last_offset, SIGNATURE_LENGTH)
+        state['signature'] = self.output_signature(state['signature_length'])
+        try:
+            with open(self.state_file_name() + '.tmp', 'w') as state_file:
+                json.dump(state, state_file)
+            os.rename(self.state_file_name() + '.tmp', self.state_file_name())
+        except (IOError, OSError, ValueError):
+            pass
+
+    #Load Saved Tracking State if it Belongs to the Current Output File, Return True if Loaded
+    def load_state(self):
+        if not self.output_exists() or not os.path.isfile(self.state_file_name()):
+            return False
+        try:
+            with open(self.state_file_name(), 'r') as state_file:
+                state = json.load(state_file)
+            if (state['out_file'] != os.path.abspath(self.out_file)
+                or state['last_offset'] > os.path.getsize(self.out_file)
+                or state['signature'] != self.output_signature(state['signature_length'])):
+                return False
+            values = dict((key, state[key]) for key in TRACKING_STATE_KEYS)
+            for key in TRACKING_STATE_TEXT_KEYS:
+                values[key] = values[key].encode('latin-1')
+        except (IOError, ValueError, KeyError, TypeError, AttributeError, UnicodeError):
+            return False
+        for key in TRACKING_STATE_KEYS:
+            setattr(self, key, values[key])
+        return True
+
+    def reset_state(self):
+        self.last_offset = 0
+        self.partial_line = ''
+        self.last_line_index = 0
+        self.next_milestone_index = 0
+        self.current_milestone = 'Not Started'
 
     def output_exists(self):
         return os.path.isfile(self.out_file)
@@ -70,20 +188,24 @@ class OutputParser():
 
     #Add Last Milestone as Termination Flag
     def prepare_terminal_flags(self):
-        if self.milestones:
+        if self.milestones and self.milestones[-1] not in self.terminal_flags:
             self.terminal_flags.append(self.milestones[-1])
 
+    #Return Matcher for All Milestones and Flags, Rebuilt Only if They Have Changed
+    def pattern_matcher(self):
+        patterns = self.milestones + self.terminal_flags + self.failure_flags
+        if self.matcher is None or self.matcher_patterns != patterns:
+            self.matcher = PatternMatcher(patterns)
+            self.matcher_patterns = list(patterns)
+        return self.matcher
+
     def check_terminal(self, line):
-        for terminal_flag in self.terminal_flags:
-            if terminal_flag in line:
-                return True
-        return False
+        hits = self.pattern_matcher().search(line)
+        return any(flag in hits for flag in self.terminal_flags)
 
     def check_failure(self, line):
-        for failure_flag in self.failure_flags:
-            if failure_flag in line:
-                return True
-        return False
+        hits = self.pattern_matcher().search(line)
+        return any(flag in hits for flag in self.failure_flags)
 
     def completion_percent(self):
         return str(int((self.next_milestone_index+1)/float(len(self.milestones)) * 100)
@@ -94,18 +216,8 @@ class OutputParser():
         if not self.output_exists():
             return False
 
-        #Get Last Output:
-        if self.shell_tracking:
-            output = subprocess.check_output(['tail', '-n', str(self.tail_length), self.out_file])
-            output = output.splitlines()
-
-        else:
-            out_file = open(self.out_file, 'r')
-            output = out_file.readlines()
-            out_file.close()
-        
-            if len(output) > self.tail_length:
-                output = output[(-1*self.tail_length):] 
+        #Get Last Output, Reading Backwards from the End of the File:
+        output = read_last_lines(self.out_file, self.tail_length)
 
         # If Empty Output File, Not Done.
         if not output:
@@ -132,70 +244,95 @@ class OutputParser():
         # No Terminal Flags Found, Not Completed.
         return False
 
+    #Output is Updated if File Size Differs from the Offset Read Through
     def check_updated(self):
         if not self.output_exists():
             print_except('Output File: %s Not Found!' % self.out_file)
 
-        if self.shell_tracking:
-            last_line = subprocess.check_output(['tail', '-n', '1', self.out_file])
+        return (os.path.getsize(self.out_file) != self.last_offset)
 
+    #Return Position of First Occurrence of Any Flag in Pattern Hits, or -1 if None Found
+    def flag_position(self, hits, flags):
+        positions = [hits[flag][0] for flag in flags if flag in hits]
+        return (min(positions) if positions else -1)
+
+    #Scan Complete Output Lines for Milestones Reached Before Any Terminal or Failure Line,
+    #Using the Positions of All Milestones and Flags Found in One Pass Over the Output.
+    #At most one milestone is reached per line, in order. Returns (Running, Failed).
+    def scan_output(self, output):
+        hits = self.pattern_matcher().search(output)
+        failure_position = self.flag_position(hits, self.failure_flags)
+        terminal_position = self.flag_position(hits, self.terminal_flags)
+        stop_positions = [x for x in [failure_position, terminal_position] if x >= 0]
+        if stop_positions:
+            scan_end = output.rfind('\n', 0, min(stop_positions)) + 1
         else:
-            with open(self.out_file, 'r') as out_file:
-                for line in out_file:
-                    pass
-                last_line= line
-        return (last_line.strip() != self.last_line.strip())
+            scan_end = len(output)
 
-    #Returns True if Not Yet Terminated
-    def check(self, all_print=True):
+        position = 0
+        while self.next_milestone_index < len(self.milestones):
+            milestone = self.milestones[self.next_milestone_index]
+            milestone_hits = hits.get(milestone, [])
+            hit_index = bisect.bisect_left(milestone_hits, position)
+            if (hit_index == len(milestone_hits) 
+                or milestone_hits[hit_index] + len(milestone) > scan_end):
+                break
+            self.current_milestone = milestone
+            self.next_milestone_index += 1
+            position = output.find('\n', milestone_hits[hit_index]) + 1
+
+        still_running = (not stop_positions 
+                         and self.next_milestone_index < len(self.milestones))
+        return (still_running, failure_position >= 0)
+
+    #Read Complete Lines Appended Since the Last Check and Scan Them for Milestones and
+    #Flags, in Blocks of READ_BLOCK_SIZE so Large Output is Never Held at Once. Lines of
+    #each block are passed to "line_function" if given. Reading stops at the block with a
+    #terminal or failure flag. Returns (Number of Lines, Running, Failed), with Running
+    #True if No Lines Were Added.
+    def update(self, line_function=None):
+        line_count = 0
         still_running = True
         failure = False
-        if self.output_exists():
-            with open(self.out_file, 'r') as out_file:
-                index = 0
-                output_enum = enumerate(out_file)
-                if index < (self.last_line_index - 2):
-                    for index, line in output_enum:
-                        if index >= (self.last_line_index - 2):
-                            break
-                output = {}
-                for index, line in output_enum:
-                    #print index, line
-                    output[index] = line
-                
-                last_output_index = index
-            #output = out_file.readlines()
-        else:
-            print_except('Output File: %s Not Found!' % self.out_file)
+        with open(self.out_file, 'rb') as out_file:
+            out_file.seek(0, os.SEEK_END)
+            #If Output File Was Replaced with Shorter File, Check From Start
+            if out_file.tell() < self.last_offset:
+                self.reset_state()
+            out_file.seek(self.last_offset)
+            while still_running:
+                block = out_file.read(READ_BLOCK_SIZE)
+                if not block:
+                    break
+                self.last_offset += len(block)
+                output = self.partial_line + block
+                complete_length = output.rfind('\n') + 1
+                self.partial_line = output[complete_length:]
+                output = output[:complete_length]
+                if not output:
+                    continue
 
-        #for line in output[self.last_line_index:]:
-        for i in range(self.last_line_index, last_output_index):
-            line = output[i]
-            if '\r' in line:
-                print line.split('\r')[-1].rstrip()
-            else:
-                print line.rstrip()
- 
-            if self.check_terminal(line):
-                still_running = False
+                lines = output.splitlines()
+                if line_function:
+                    line_function(lines)
+                self.last_line = lines[-1].strip()
+                self.last_line_index += len(lines)
+                line_count += len(lines)
+                (still_running, failure) = self.scan_output(output)
+        return (line_count, still_running, failure)
 
-            if self.check_failure(line):
-                still_running = False
-                failure = True
+    def print_lines(self, lines):
+        print '\n'.join(line.split('\r')[-1].rstrip() for line in lines)
 
-            if self.milestones[self.next_milestone_index] in line and still_running:
-                self.milestone = self.milestones[self.next_milestone_index]
-                self.next_milestone_index += 1
-                
-                if self.next_milestone_index == len(self.milestones):
-                    still_running = False
+    #Print Lines Completed Since the Last Check, Exiting if the Job Has Failed.
+    #Returns True if Not Yet Terminated
+    def check(self, all_print=True):
+        if not self.output_exists():
+            print_except('Output File: %s Not Found!' % self.out_file)
 
-            self.last_line = line.strip()
-            self.last_line_index += 1
-                
+        (line_count, still_running, failure) = self.update(self.print_lines)
         if failure:
             print_exit(['', '%s Job has failed.' % self.job_type, ' --- ', 
                         '(To Retry, Delete Output File: %s )' % self.out_file, '', ''], 0)
 
         return still_running
-
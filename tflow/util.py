@@ -8,11 +8,12 @@
 
 import sys
 import os
-import subprocess
 import signal
-import gzip
+import multiprocessing
 from time import sleep
 
+from .cache import get_result, store_result
+
 # --- Global Constants ---
 
 BOOL = [True, False]
@@ -35,6 +36,13 @@ DEFAULT_SETTINGS = {'TFLOW_Version':'0.9',
                     'overwrite':False,
                     'confirm':False,
                     'print_test_output':False,
+                    'parallel_steps':True,
+                    'use_broker':True,
+                    'broker_shrink':True,
+                    'broker_shrink_memory':False,
+                    'use_cache':True,
+                    'cache_hash':False,
+                    'use_fingerprint':True,
                     }
 
 # --- Output Functions ---
@@ -148,12 +156,14 @@ def write_date_time(name, start=None):
 SEQUENCE_REPORT_SEPARATOR = '\t'
 SEQUENCE_REPORT_NULL_CHR = '-'
 REPORT_TYPES = {'sequence':'SEQUENCE FILE REPORT', 'recapture':'GENE RECAPTURE REPORT',
-                'annotation':'SEQUENCE ANNOTATION REPORT', 'unknown':'UNKNOWN REPORT TYPE'}
+                'annotation':'SEQUENCE ANNOTATION REPORT', 'package':'PACKAGED FILE REPORT',
+                'unknown':'UNKNOWN REPORT TYPE'}
 SEQUENCE_REPORT_HEADERS = ['Count', 'Len', 'Av.Len', 'SRange', 'ERange', 'Median', 'N50']
 RECAPTURE_REPORT_HEADERS = ['Analys.', 'Cutoff', 'Expect.', 'Found', 'Missing', 'Total', 
                             'Percent']
 ANNOTATION_REPORT_HEADERS = ['Analys.', 'Cutoff', 'TotSqs.', 'AnnSqs.', 'Percent', 'TotAnn.', 
                              'Remapd.'] 
+PACKAGE_REPORT_HEADERS = ['Format', 'InSize', 'OutSize', 'Ratio', 'Blocks', 'CPUs']
                             
 
 def write_report(file_name, report, separator=SEQUENCE_REPORT_SEPARATOR, aux_reports=[]):
@@ -174,6 +184,8 @@ def write_report(file_name, report, separator=SEQUENCE_REPORT_SEPARATOR, aux_rep
         headers = RECAPTURE_REPORT_HEADERS
     elif report_type == 'annotation':
         headers = ANNOTATION_REPORT_HEADERS
+    elif report_type == 'package':
+        headers = PACKAGE_REPORT_HEADERS
     else:
         headers = sorted(report.keys())
 
@@ -257,6 +269,7 @@ def combine_report(reports, read_separator=SEQUENCE_REPORT_SEPARATOR, write_sepa
 
 
 # --- Reading Functions ---
+TAIL_BLOCK_SIZE = 8192
 
 # - Read a File
 def read_file(file_name):
@@ -266,6 +279,38 @@ def read_file(file_name):
     return contents
 
 
+# - Read the Last "line_count" Lines of a File, Without Trailing Newlines
+#Blocks are read backwards from the end of the file only until enough newlines are
+#found, so the cost is independent of the file's length. A final line without a
+#newline counts as a line, as with "tail -n".
+def read_last_lines(file_name, line_count, block_size=TAIL_BLOCK_SIZE):
+    if line_count < 1:
+        return []
+    with open(file_name, 'rb') as in_file:
+        in_file.seek(0, os.SEEK_END)
+        position = in_file.tell()
+        blocks = []
+        newline_count = 0
+        ignore_final_newline = True
+        while position > 0 and newline_count < line_count:
+            read_size = min(block_size, position)
+            position -= read_size
+            in_file.seek(position)
+            block = in_file.read(read_size)
+            if ignore_final_newline:
+                if block.endswith('\n'):
+                    block = block[:-1]
+                ignore_final_newline = False
+            newline_count += block.count('\n')
+            blocks.append(block)
+    if not blocks:
+        return []
+    lines = ''.join(reversed(blocks)).split('\n')
+    if position > 0:
+        lines = lines[1:]
+    return lines[-line_count:]
+
+
 # - Read a List From a File
 def read_file_list(file_name):
     return_list = []
@@ -407,7 +452,8 @@ def stop_TFLOW_process(pid_file, job_name):
     else:
         print '    %s Job-PID Not Found.' % job_name
 
-AUTO_SUFFIXES = ['.auto.sh', '.auto.settings', '.auto.timing', '.auto.pid', '.auto.result_name']
+AUTO_SUFFIXES = ['.auto.sh', '.auto.settings', '.auto.timing', '.auto.pid', '.auto.result_name',
+                 '.auto.fingerprint', '.auto.track']
 AUTO_OUT_SUFFIXES = ['.out', '.report', '.auto.analysis']
 def clean_TFLOW_auto_files(job_type, project_dir, working_dir, remove_outfiles=True,
                            confirm=False, dirs=[], files=[], prefixes=[], suffixes=[], 
@@ -554,22 +600,65 @@ def write_settings(options, out_file, message=None):
     write_file(out_file, return_settings(options, message=None))
 
 # --- Sequence File Utilities ---
-def count_FASTA(file_name):
+COUNT_BLOCK_SIZE = 4194304
+
+#Count Occurrences of "pattern" in a File Object Read in Large Blocks. The last 
+#len(pattern)-1 characters of each block are carried forward so matches spanning
+#block boundaries are counted once, starting from "prefix" as if it preceded the file.
+#Returns the Count and the Final Character Read.
+def count_in_blocks(file_object, pattern, block_size=COUNT_BLOCK_SIZE, prefix=''):
     count = 0
-    with open(file_name, 'r') as file_object:
-        for line in file_object:
-            if line.startswith('>'):
-                count += 1
+    carry = prefix
+    last_character = ''
+    carry_length = len(pattern) - 1
+    while True:
+        block = file_object.read(block_size)
+        if not block:
+            break
+        last_character = block[-1]
+        if carry_length:
+            block = carry + block
+            carry = block[-carry_length:]
+        count += block.count(pattern)
+    return (count, last_character)
+
+#Count Lines Beginning with ">", as "\n>" in the File Preceded by a Newline
+def count_FASTA_object(file_object, block_size=COUNT_BLOCK_SIZE):
+    (count, last_character) = count_in_blocks(file_object, '\n>', block_size, prefix='\n')
     return count
 
-def count_FASTA_GZ(file_name):
-    count = 0
-    with gzip.open(file_name, 'r') as file_object:
-        for line in file_object:
-            if line.startswith('>'):
-                count += 1
+#Count Lines (Including a Final Line Without a Newline) Divided by Four
+def count_FASTQ_object(file_object, block_size=COUNT_BLOCK_SIZE):
+    (line_count, last_character) = count_in_blocks(file_object, '\n', block_size)
+    if last_character and last_character != '\n':
+        line_count += 1
+    return (line_count/4)
+
+def open_compressed(file_name):
+    from .compression import open_sequence_file
+    return open_sequence_file(file_name)
+
+def open_binary(file_name):
+    return open(file_name, 'rb')
+
+#Return Count from Project Cache if Current, Otherwise Count and Store
+def cached_count(file_name, result_type, open_function, count_function):
+    count = get_result(file_name, result_type)
+    if count is None:
+        file_object = open_function(file_name)
+        try:
+            count = count_function(file_object)
+        finally:
+            file_object.close()
+        store_result(file_name, result_type, count)
     return count
 
+def count_FASTA(file_name):
+    return cached_count(file_name, 'FASTA_count', open_binary, count_FASTA_object)
+
+def count_FASTA_GZ(file_name):
+    return cached_count(file_name, 'FASTA_count', open_compressed, count_FASTA_object)
+
 def count_FASTA_all(file_name):
     if is_FASTA(file_name):
         return count_FASTA(file_name)
@@ -578,16 +667,10 @@ def count_FASTA_all(file_name):
     return 0
 
 def count_FASTQ(file_name):
-    with open(file_name, 'r') as file_object:
-        for line_number, line in enumerate(file_object, start=1):
-            pass
-    return (line_number/4)
+    return cached_count(file_name, 'FASTQ_count', open_binary, count_FASTQ_object)
 
 def count_FASTQ_GZ(file_name):
-    with gzip.open(file_name, 'r') as file_object:
-        for line_number, line in enumerate(file_object, start=1):
-            pass
-    return (line_number/4)
+    return cached_count(file_name, 'FASTQ_count', open_compressed, count_FASTQ_object)
 
 def count_FASTQ_all(file_name):
     if is_FASTQ(file_name):
@@ -656,33 +739,70 @@ def ensure_FASTQ_only_GZ(file_name):
     return True
 
 
-def count_sequences(contents, print_results=True, column_width=50):
-    counts = []
-    total_count = 0
-    for file_name in contents:
-        if is_FASTA(file_name):
-            count = count_FASTA(file_name)
+def count_sequence_file(file_name):
+    if is_FASTA(file_name):
+        count = count_FASTA(file_name)
 
-        elif is_FASTA_GZ(file_name):
-            count = count_FASTA_GZ(file_name)
+    elif is_FASTA_GZ(file_name):
+        count = count_FASTA_GZ(file_name)
 
-        elif is_FASTQ(file_name):
-            count = count_FASTQ(file_name)
+    elif is_FASTQ(file_name):
+        count = count_FASTQ(file_name)
 
-        elif is_FASTQ_GZ(file_name):
-            count = count_FASTQ_GZ(file_name)
+    elif is_FASTQ_GZ(file_name):
+        count = count_FASTQ_GZ(file_name)
 
-        else:
-            print >> sys.stderr, ('File Format for File: %s Not Identified, ' % file_name
-                                  + 'Assuming FASTA' )
-            count = count_FASTA(file_name)
+    else:
+        print >> sys.stderr, ('File Format for File: %s Not Identified, ' % file_name
+                              + 'Assuming FASTA' )
+        count = count_FASTA(file_name)
 
-        if count != None:
-            if print_results:
-                print file_name.ljust(column_width), count
-                sys.stdout.flush()
-            counts.append((file_name, count))
-            total_count += count
+    return count
+
+#Pool Worker, Returns File Name with Count so Results can be Matched to Input
+def count_sequence_file_worker(file_name):
+    return (file_name, count_sequence_file(file_name))
+
+#Number of Worker Processes for "jobs" Requested, Bounded by max_CPU and File Count
+def bounded_jobs(jobs, max_CPU=None, task_count=None):
+    jobs = max(int(jobs), 1)
+    if max_CPU:
+        jobs = min(jobs, int(max_CPU))
+    if task_count is not None:
+        jobs = min(jobs, max(task_count, 1))
+    return jobs
+
+#Count Sequences in Files, Optionally Across a Pool of "jobs" Worker Processes.
+#Results are printed as they complete, in input order, so the table is unchanged.
+def count_sequences(contents, print_results=True, column_width=50, jobs=1, max_CPU=None):
+    counts = []
+    total_count = 0
+    jobs = bounded_jobs(jobs, max_CPU, len(contents))
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs)
+        results = pool.imap(count_sequence_file_worker, contents, chunksize=1)
+    else:
+        pool = None
+        results = (count_sequence_file_worker(file_name) for file_name in contents)
+
+    try:
+        for (file_name, count) in results:
+            if count != None:
+                if print_results:
+                    print file_name.ljust(column_width), count
+                    sys.stdout.flush()
+                counts.append((file_name, count))
+                total_count += count
+    except:
+        if pool:
+            pool.terminate()
+        raise
+    else:
+        if pool:
+            pool.close()
+    finally:
+        if pool:
+            pool.join()
 
     if print_results and len(counts) > 1:
         print 'Total'.ljust(column_width), total_count
@@ -691,24 +811,6 @@ def count_sequences(contents, print_results=True, column_width=50):
 
     return counts
 
-# --- Depreciated Shell-Based Sequence Counting ---
-
-def shell_count_FASTA(file_name):
-    return int(subprocess.check_output('grep -c "^>" %s' % file_name, 
-                                       shell=True).strip())
-
-def shell_count_FASTA_GZ(file_name):
-    return int((subprocess.check_output('zcat %s | grep -c "^>"' % file_name, 
-                                        shell=True)).strip())
-
-def shell_count_FASTQ(file_name):
-    return (int((subprocess.check_output('wc -l %s' % file_name, 
-                                         shell=True)).split()[0]) / 4)
-
-def shell_count_FASTQ_GZ(file_name):
-    return (int((subprocess.check_output('zcat %s | wc -l' % file_name, 
-                                         shell=True)).split()[0]) / 4)
-
 # --- Type Conversion Utilities ---
 def string_to_boolean(string):
     if not string or string.lower in ['f', 'false']:
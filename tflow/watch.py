@@ -0,0 +1,190 @@
+#TFLOW Component: File Watcher Waking on Changes to Tracked Output Files
+#
+#Dan Stribling
+#Florida State University
+#Center for Genomics and Personalized Medicine
+#Version 0.9, 04/20/2015
+#Project URL: http://www.github.com/fsugenomics/tflow
+
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from time import sleep, time
+
+#inotify Event Masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+EVENT_BUFFER_SIZE = 65536
+
+#Changes Written by Other Hosts to Network Filesystems Do Not Raise inotify Events,
+#so Watched Files are Also Checked with stat() at Least Every STAT_INTERVAL Seconds.
+STAT_INTERVAL = 60
+
+def load_inotify():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        for function_name in ['inotify_init1', 'inotify_add_watch', 'inotify_rm_watch']:
+            getattr(libc, function_name)
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+LIBC = load_inotify()
+
+def file_state(file_name):
+    try:
+        file_stat = os.stat(file_name)
+    except OSError:
+        return None
+    return (file_stat.st_size, file_stat.st_mtime, file_stat.st_ino)
+
+#Watch Any Number of Files with a Single inotify Descriptor. Directories containing the
+#files are watched, rather than the files, so files that are created or replaced after
+#watching starts are followed. Where inotify is not available, files are polled with
+#stat() every "poll_interval" seconds.
+class FileWatcher():
+    def __init__(self, poll_interval=5, use_inotify=True):
+        self.poll_interval = poll_interval
+        self.files = {}
+        self.directories = {}
+        self.watch_descriptors = {}
+        self.fd = None
+        if use_inotify and LIBC is not None:
+            fd = LIBC.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self.fd = fd
+
+    def uses_inotify(self):
+        return self.fd is not None
+
+    def add(self, file_name):
+        file_name = os.path.abspath(file_name)
+        if file_name in self.files:
+            return
+        self.files[file_name] = file_state(file_name)
+        if self.fd is None:
+            return
+        directory = os.path.dirname(file_name)
+        if directory in self.directories:
+            self.directories[directory][1].add(os.path.basename(file_name))
+            return
+        descriptor = LIBC.inotify_add_watch(self.fd, directory, WATCH_MASK)
+        if descriptor < 0:
+            #Unwatchable Directories Fall Back to stat() Checks
+            return
+        self.directories[directory] = (descriptor, set([os.path.basename(file_name)]))
+        self.watch_descriptors[descriptor] = directory
+
+    def remove(self, file_name):
+        file_name = os.path.abspath(file_name)
+        if file_name not in self.files:
+            return
+        del self.files[file_name]
+        directory = os.path.dirname(file_name)
+        if directory in self.directories:
+            (descriptor, names) = self.directories[directory]
+            names.discard(os.path.basename(file_name))
+            if not names:
+                LIBC.inotify_rm_watch(self.fd, descriptor)
+                del self.directories[directory]
+                del self.watch_descriptors[descriptor]
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    #Return Watched Files Whose Size, Modification Time, or Inode Changed Since Last Seen
+    def changed_files(self, file_names=None):
+        changed = []
+        for file_name in (self.files.keys() if file_names is None else file_names):
+            state = file_state(file_name)
+            if state != self.files[file_name]:
+                self.files[file_name] = state
+                changed.append(file_name)
+        return changed
+
+    def read_events(self):
+        event_files = set()
+        while True:
+            try:
+                events = os.read(self.fd, EVENT_BUFFER_SIZE)
+            except OSError as error:
+                if error.errno in [errno.EAGAIN, errno.EWOULDBLOCK]:
+                    break
+                raise
+            if not events:
+                break
+            position = 0
+            while position + EVENT_HEADER.size <= len(events):
+                (descriptor, mask, cookie, name_length) = EVENT_HEADER.unpack_from(events,
+                                                                                  position)
+                position += EVENT_HEADER.size
+                name = events[position:position + name_length].rstrip('\0')
+                position += name_length
+                if descriptor in self.watch_descriptors and name:
+                    event_files.add(os.path.join(self.watch_descriptors[descriptor], name))
+        return [file_name for file_name in event_files if file_name in self.files]
+
+    #Wait Until a Watched File Changes or "timeout" Seconds Pass (Indefinitely if None).
+    #Returns List of Changed Files, Empty if Timed Out.
+    def wait(self, timeout=None):
+        start_time = time()
+        last_stat_time = start_time
+        while True:
+            if timeout is None:
+                remaining = None
+            else:
+                remaining = max(timeout - (time() - start_time), 0)
+
+            if self.fd is None or not self.directories:
+                interval = self.poll_interval
+                if remaining is not None:
+                    interval = min(interval, remaining)
+                sleep(interval)
+                changed = self.changed_files()
+
+            else:
+                interval = STAT_INTERVAL - (time() - last_stat_time)
+                if remaining is not None:
+                    interval = min(interval, remaining)
+                try:
+                    readable = select.select([self.fd], [], [], max(interval, 0))[0]
+                except select.error as error:
+                    if error.args[0] != errno.EINTR:
+                        raise
+                    readable = []
+                if readable:
+                    changed = self.changed_files(self.read_events())
+                else:
+                    changed = []
+                if time() - last_stat_time >= STAT_INTERVAL:
+                    changed += [file_name for file_name in self.changed_files()
+                                if file_name not in changed]
+                    last_stat_time = time()
+
+            if changed:
+                return changed
+            if remaining is not None and time() - start_time >= timeout:
+                return []